@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmarks reproducibles de los decodificadores y diagnósticos.
+
+Mide el decodificador JT/T 808 (0x0200/0x0704), la conversión IMEI/BCD y las
+consultas de CheckAsset, ValidateDB y MonitorW2j contra una base generada con
+GenerateNavtrackData.py. Los resultados se emiten en JSON para comparar
+corridas y detectar regresiones.
+
+Uso:
+    python3 BenchmarkDiagnostics.py [--output bench_output.json] [--compare anterior.json]
+        [--uri mongodb://localhost:27017] [--db navtrack_bench] [--no-db]
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import DecodeW2jBatch
+import GenerateNavtrackData as data
+
+# Una regresión es un benchmark cuyo mejor tiempo (min_s, el menos ruidoso)
+# empeora más de este factor
+REGRESSION_THRESHOLD = 1.10
+
+
+def measure(name, func, number, repeat=5, items=1):
+    """
+    Ejecuta func `number` veces por ronda durante `repeat` rondas y retorna
+    las estadísticas por llamada. `items` es cuántos elementos procesa cada
+    llamada (posiciones, tramas...) para reportar throughput.
+    """
+    func()  # Calentamiento
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - t) / number)
+
+    median = statistics.median(timings)
+    result = {
+        "name": name,
+        "number": number,
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "items_per_s": items / median if median else None,
+    }
+    print(f"   {name:<40} {median * 1e6:>12.1f} µs  {result['items_per_s'] or 0:>14,.0f} items/s")
+    return result
+
+
+def sample_frames():
+    """Tramas sintéticas fijas: 0x0200 sueltos y lotes 0x0704 de 25 posiciones."""
+    dt = datetime(2025, 1, 1)
+    single = [
+        data.jt808_frame(0x0200, "18404228323", i, data.jt808_location_body(
+            dt + timedelta(seconds=i), 19.43, -99.13, 42.5, i % 360))
+        for i in range(100)
+    ]
+    batch = [
+        data.jt808_frame(0x0704, "18404228323", i, data.jt808_batch_body([
+            data.jt808_location_body(dt + timedelta(seconds=i * 25 + j), 19.43, -99.13, 42.5, j)
+            for j in range(25)
+        ]))
+        for i in range(100)
+    ]
+    return single, batch
+
+
+def bench_decoders():
+    single, batch = sample_frames()
+    return [
+        measure("jt808.iter_frames.0x0200", lambda: sum(1 for _ in DecodeW2jBatch.iter_frames(single)),
+                number=20, items=len(single)),
+        measure("jt808.iter_frames.0x0704", lambda: sum(1 for _ in DecodeW2jBatch.iter_frames(batch)),
+                number=10, items=len(batch) * 25),
+        measure("jt808.decode_columns.0x0704", lambda: DecodeW2jBatch.decode_columns(batch),
+                number=10, items=len(batch) * 25),
+        measure("jt808.unescape", lambda: [DecodeW2jBatch.unescape(f) for f in batch],
+                number=50, items=len(batch)),
+    ]
+
+
+def bench_imei():
+    # Login GT06 y header JT/T 808 como los analizan CheckAsset, ValidateDB y AnalyzeConcoxIMEI
+    login = data.gt06_login("868120241234567", 1)
+    header = data.jt808_frame(0x0100, "18404228323", 1, bytes(37))
+    logins, headers = [login] * 1000, [header] * 1000
+    return [
+        measure("imei.gt06.hex_join", lambda: [''.join([f'{b:02X}' for b in m[4:12]]) for m in logins],
+                number=20, items=len(logins)),
+        measure("imei.gt06.bytes_hex", lambda: [m[4:12].hex().upper() for m in logins],
+                number=20, items=len(logins)),
+        measure("bcd.jt808.nibble_join", lambda: [
+            ''.join(f'{(b >> 4)}{(b & 0x0F)}' for b in m[5:11]).lstrip('0') for m in headers],
+            number=20, items=len(headers)),
+        measure("bcd.jt808.bcd_to_str", lambda: [DecodeW2jBatch.bcd_to_str(m[5:11]) for m in headers],
+                number=20, items=len(headers)),
+    ]
+
+
+def bench_queries(db):
+    from NavtrackQueries import run_parallel, recent_connections, recent_messages
+
+    asset = db.assets.find_one({}, {"_id": 1})
+    if not asset:
+        print("   (base vacía, se omiten las consultas)")
+        return []
+    asset_id = asset["_id"]
+    device = db.devices.find_one({"aid": asset_id}, {"_id": 1})
+    device_id = device["_id"] if device else None
+
+    def check_asset_sequential():
+        db.assets.find_one({"_id": asset_id})
+        db.devices.find_one({"aid": asset_id})
+        list(db.devices_connections.find({"pp": data.GT06_PORT}).sort("cd", -1).limit(5))
+        list(db.devices_messages.find({"md.did": device_id}).sort("cd", -1).limit(5))
+
+    def check_asset_parallel():
+        run_parallel({
+            "asset": lambda: db.assets.find_one({"_id": asset_id}),
+            "device": lambda: db.devices.find_one({"aid": asset_id}),
+            "connections": lambda: recent_connections(db, data.GT06_PORT, 5),
+            "messages": lambda: recent_messages(db, {"md.aid": asset_id}, 5),
+        })
+
+    def monitor_poll():
+        db.devices_connections.find_one({"pp": data.JT808_PORT}, sort=[("cd", -1)])
+        db.devices_messages.count_documents({"md.did": device_id})
+
+    return [
+        measure("query.check_asset.sequential", check_asset_sequential, number=10),
+        measure("query.check_asset.parallel", check_asset_parallel, number=10),
+        measure("query.connections.full_docs", lambda: list(
+            db.devices_connections.find({"pp": data.JT808_PORT}).sort("cd", -1).limit(5)), number=10),
+        measure("query.connections.projected", lambda: recent_connections(db, data.JT808_PORT, 5), number=10),
+        measure("query.monitor_w2j.poll", monitor_poll, number=10),
+    ]
+
+
+def compare(current, previous_path):
+    """Imprime las diferencias contra una corrida anterior y retorna las regresiones."""
+    with open(previous_path) as f:
+        previous = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    print()
+    print(f"COMPARACION CONTRA {previous_path}:")
+    for result in current:
+        before = previous.get(result["name"])
+        if not before:
+            continue
+        ratio = result["min_s"] / before["min_s"]
+        flag = "⚠ REGRESION" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"   {result['name']:<40} x{ratio:>6.2f} {flag}")
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append(result["name"])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de decodificadores y diagnósticos")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="navtrack_bench")
+    parser.add_argument("--no-db", action="store_true", help="solo benchmarks sin base de datos")
+    parser.add_argument("--output", default="bench_output.json", help="archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para detectar regresiones")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("BENCHMARKS DE DIAGNOSTICOS")
+    print("=" * 80)
+    print()
+
+    results = []
+    print("1. DECODIFICADOR JT/T 808:")
+    results += bench_decoders()
+    print()
+    print("2. CONVERSION IMEI/BCD:")
+    results += bench_imei()
+    print()
+
+    if not args.no_db:
+        from pymongo import MongoClient
+        print(f"3. CONSULTAS ({args.db}):")
+        with MongoClient(args.uri) as client:
+            results += bench_queries(client[args.db])
+        print()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "db": None if args.no_db else args.db,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Decodificador de tramas JT/T 808 (W2j, puerto 7053) con expansión de 0x0704.
+
+Cada trama 0x0704 (Batch Location Report) contiene N reportes 0x0200 que el
+dispositivo acumuló mientras estuvo sin conexión. Este módulo los expande en
+posiciones individuales, ya sea como generador perezoso (iter_locations) o
+como lote columnar (decode_columns), y permite cruzarlas contra lo guardado
+en devices_messages.
+
+Estructura de trama (sin delimitadores 0x7E, ya sin escape):
+[MsgID 2B] [MsgBodyAttr 2B] [DeviceID 6B] [SeqNum 2B] [Body...] [Checksum 1B]
+
+Body 0x0704:
+[Cantidad 2B] [Tipo 1B] { [Longitud 2B] [Body 0x0200 ...] } x Cantidad
+
+Body 0x0200:
+[AlarmFlag 4B] [Status 4B] [Latitude 4B] [Longitude 4B] [Altitude 2B]
+[Speed 2B] [Direction 2B] [DateTime 6B BCD] [Información adicional...]
+
+Uso:
+    python3 DecodeW2jBatch.py [--limit N] [--device-id <ObjectId>]
+"""
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from datetime import datetime
+
+LOCATION_REPORT = 0x0200
+BATCH_LOCATION_REPORT = 0x0704
+
+# Cuerpo fijo de un 0x0200: alarma, status, lat, lon, alt, vel, rumbo, fecha BCD
+_LOCATION = struct.Struct(">IIIIHHH6s")
+_U16 = struct.Struct(">H")
+
+Location = namedtuple(
+    "Location",
+    ["device_id", "seq", "dt", "lat", "lon", "alt", "spd", "hdg", "valid", "alarm", "status"],
+)
+
+
+class FrameError(ValueError):
+    """Trama JT/T 808 mal formada (longitud, checksum o cuerpo truncado)."""
+
+
+def unescape(data):
+    """
+    Remueve escape del mensaje (0x7D 0x02 -> 0x7E, 0x7D 0x01 -> 0x7D).
+    El orden de los reemplazos importa: 0x7D 0x02 primero, así una secuencia
+    escapada 7D 01 02 (= 7D 02 original) no se convierte en 0x7E.
+    """
+    if 0x7D not in data:
+        return data
+    return data.replace(b"\x7d\x02", b"\x7e").replace(b"\x7d\x01", b"\x7d")
+
+
+def strip_delimiters(data):
+    """Quita los 0x7E de inicio/fin si la trama se guardó con delimitadores."""
+    start = 1 if data[:1] == b"\x7e" else 0
+    end = len(data) - 1 if len(data) > start and data[-1] == 0x7E else len(data)
+    return data[start:end]
+
+
+def bcd_to_str(data):
+    """
+    Convierte BCD a string de dígitos sin leading zeros
+    Ejemplo: 01 84 04 22 83 23 → "18404228323"
+    """
+    return data.hex().lstrip("0")
+
+
+def bcd_to_datetime(data):
+    """Fecha/hora BCD (YY MM DD HH mm ss) en UTC, o None si es inválida."""
+    s = data.hex()
+    try:
+        return datetime(2000 + int(s[0:2]), int(s[2:4]), int(s[4:6]),
+                        int(s[6:8]), int(s[8:10]), int(s[10:12]))
+    except ValueError:
+        return None
+
+
+def checksum(data):
+    """Checksum XOR de todos los bytes."""
+    result = 0
+    for b in data:
+        result ^= b
+    return result
+
+
+def parse_frame(raw, verify=True):
+    """
+    Parsea una trama cruda (tal como se guarda en devices_connections.m)
+    y retorna (msg_id, device_id, seq, body) con body como memoryview.
+
+    Soporta el header de la versión 2019 (bit 14 de MsgBodyAttr: byte de
+    versión + DeviceID de 10 bytes) y el subpaquete (bit 13: total e índice
+    de 2 bytes cada uno). Los subpaquetes no se reensamblan: solo el primero
+    trae el encabezado del lote, así que el índice > 1 es FrameError.
+    """
+    data = unescape(strip_delimiters(bytes(raw)))
+    if len(data) < 13:
+        raise FrameError(f"trama muy corta ({len(data)} bytes)")
+    if verify and checksum(data[:-1]) != data[-1]:
+        raise FrameError("checksum inválido")
+
+    msg_id, attr = data[0] << 8 | data[1], data[2] << 8 | data[3]
+    body_len = attr & 0x03FF
+
+    if attr & 0x4000:
+        device_id, offset = bcd_to_str(data[5:15]), 15
+    else:
+        device_id, offset = bcd_to_str(data[4:10]), 10
+    # El header 2019 ocupa 17 bytes: una trama de 13 a 16 bytes con el bit 14
+    # no alcanza a traer Seq y checksum
+    if len(data) < offset + 3:
+        raise FrameError(f"header incompleto ({len(data)} bytes)")
+    seq = data[offset] << 8 | data[offset + 1]
+    offset += 2
+    if attr & 0x2000:
+        if len(data) < offset + 5:
+            raise FrameError(f"header de subpaquete incompleto ({len(data)} bytes)")
+        total, index = _U16.unpack_from(data, offset)[0], _U16.unpack_from(data, offset + 2)[0]
+        if index > 1:
+            raise FrameError(f"subpaquete {index}/{total} sin reensamblar")
+        offset += 4
+
+    # La longitud del cuerpo solo tiene 10 bits: lotes 0x0704 grandes la
+    # desbordan, así que se usa todo lo que hay entre el header y el checksum
+    available = len(data) - 1 - offset
+    if available < body_len:
+        raise FrameError(f"cuerpo truncado (esperado {body_len} bytes)")
+    return msg_id, device_id, seq, memoryview(data)[offset:len(data) - 1]
+
+
+def _location_bodies(msg_id, body):
+    """Genera los cuerpos 0x0200 contenidos en un cuerpo 0x0200 o 0x0704."""
+    if msg_id == LOCATION_REPORT:
+        yield body
+        return
+    if msg_id != BATCH_LOCATION_REPORT or len(body) < 3:
+        return
+
+    count = _U16.unpack_from(body, 0)[0]
+    offset, end = 3, len(body)
+    for _ in range(count):
+        if offset + 2 > end:
+            raise FrameError("lote truncado (longitud de item)")
+        item_len = _U16.unpack_from(body, offset)[0]
+        offset += 2
+        if offset + item_len > end:
+            raise FrameError("lote truncado (cuerpo de item)")
+        yield body[offset:offset + item_len]
+        offset += item_len
+
+
+def iter_locations(raw, verify=True):
+    """
+    Generador perezoso de Location para una trama 0x0200 o 0x0704.
+    Otros tipos de mensaje no generan nada. Un lote truncado es FrameError
+    antes de generar posiciones: igual que decode_columns, la trama se
+    toma completa o no se toma.
+    """
+    msg_id, device_id, seq, body = parse_frame(raw, verify)
+    unpack = _LOCATION.unpack_from
+    for item in list(_location_bodies(msg_id, body)):
+        if len(item) < _LOCATION.size:
+            continue
+        alarm, status, lat_raw, lon_raw, alt, spd, hdg, dt = unpack(item)
+
+        # Hemisferio según status: bit 2 = Oeste, bit 3 = Sur
+        lat = lat_raw / 1_000_000.0
+        lon = lon_raw / 1_000_000.0
+        if status & 0x08:
+            lat = -lat
+        if status & 0x04:
+            lon = -lon
+
+        yield Location(device_id, seq, bcd_to_datetime(dt), lat, lon, alt,
+                       spd / 10.0, hdg, bool(status & 0x02), alarm, status)
+
+
+def iter_frames(frames, verify=True, errors=None):
+    """
+    Expande una secuencia de tramas crudas en Location. Las tramas inválidas
+    se omiten; si se pasa una lista en errors, se agrega (índice, error).
+    """
+    for i, raw in enumerate(frames):
+        try:
+            yield from iter_locations(raw, verify)
+        except FrameError as e:
+            if errors is not None:
+                errors.append((i, e))
+
+
+def decode_columns(frames, verify=True):
+    """
+    Decodifica un conjunto de tramas en formato columnar: un dict de
+    columnas (array.array para numéricos, list para device_id y dt).
+    Útil para back-fill masivo sin crear un objeto por posición.
+    """
+    cols = {
+        "device_id": [], "dt": [],
+        "lat": array("d"), "lon": array("d"), "spd": array("d"),
+        "alt": array("H"), "hdg": array("H"), "valid": array("B"),
+        "alarm": array("I"), "status": array("I"),
+    }
+    device_id_append, dt_append = cols["device_id"].append, cols["dt"].append
+    lat_append, lon_append = cols["lat"].append, cols["lon"].append
+    spd_append, alt_append = cols["spd"].append, cols["alt"].append
+    hdg_append, valid_append = cols["hdg"].append, cols["valid"].append
+    alarm_append, status_append = cols["alarm"].append, cols["status"].append
+    unpack, size = _LOCATION.unpack_from, _LOCATION.size
+
+    for raw in frames:
+        try:
+            msg_id, device_id, _, body = parse_frame(raw, verify)
+            items = list(_location_bodies(msg_id, body))
+        except FrameError:
+            continue
+        for item in items:
+            if len(item) < size:
+                continue
+            alarm, status, lat_raw, lon_raw, alt, spd, hdg, dt = unpack(item)
+            device_id_append(device_id)
+            dt_append(bcd_to_datetime(dt))
+            lat_append(-lat_raw / 1_000_000.0 if status & 0x08 else lat_raw / 1_000_000.0)
+            lon_append(-lon_raw / 1_000_000.0 if status & 0x04 else lon_raw / 1_000_000.0)
+            spd_append(spd / 10.0)
+            alt_append(alt)
+            hdg_append(hdg)
+            valid_append(1 if status & 0x02 else 0)
+            alarm_append(alarm)
+            status_append(status)
+    return cols
+
+
+def cross_check(db, device_id, locations):
+    """
+    Compara posiciones decodificadas contra devices_messages de un device.
+    Usa una sola consulta con proyección sobre pos.d en el rango de fechas
+    de las posiciones. Retorna (guardadas, faltantes).
+    """
+    dates = [loc.dt for loc in locations if loc.dt is not None]
+    if not dates:
+        return [], []
+
+    stored_dates = {
+        doc["pos"]["d"]
+        for doc in db.devices_messages.find(
+            {"md.did": device_id, "pos.d": {"$gte": min(dates), "$lte": max(dates)}},
+            {"pos.d": 1, "_id": 0},
+        )
+        if doc.get("pos") and doc["pos"].get("d")
+    }
+
+    stored, missing = [], []
+    for loc in locations:
+        (stored if loc.dt in stored_dates else missing).append(loc)
+    return stored, missing
+
+
+def main(argv=None):
+    import argparse
+    from pymongo import MongoClient
+    from bson import ObjectId
+
+    parser = argparse.ArgumentParser(description="Expande lotes 0x0704 guardados en devices_connections")
+    parser.add_argument("--uri", default="mongodb://31.97.146.1:27017")
+    parser.add_argument("--port", type=int, default=7053)
+    parser.add_argument("--limit", type=int, default=50, help="conexiones a revisar (0 = todas)")
+    parser.add_argument("--device-id", help="ObjectId del device para cruzar contra devices_messages")
+    args = parser.parse_args(argv)
+
+    db = MongoClient(args.uri)["navtrack"]
+
+    print("=" * 80)
+    print(f"EXPANSION DE LOTES 0x0704 - PUERTO {args.port}")
+    print("=" * 80)
+    print()
+
+    cursor = db.devices_connections.find({"pp": args.port}, {"m": 1}).sort("_id", -1)
+    if args.limit:
+        cursor = cursor.limit(args.limit)
+
+    errors = []
+    locations = list(iter_frames((m for conn in cursor for m in conn.get("m") or []), errors=errors))
+
+    by_device = {}
+    for loc in locations:
+        by_device.setdefault(loc.device_id, []).append(loc)
+
+    print(f"Posiciones decodificadas: {len(locations)}")
+    print(f"Tramas inválidas: {len(errors)}")
+    print()
+    for serial, locs in sorted(by_device.items()):
+        valid = sum(1 for loc in locs if loc.valid)
+        print(f"   Device {serial}: {len(locs)} posiciones ({valid} con GPS válido)")
+        last = max((loc for loc in locs if loc.dt), key=lambda loc: loc.dt, default=None)
+        if last:
+            print(f"     Última: {last.dt} lat={last.lat} lon={last.lon} "
+                  f"vel={last.spd} km/h rumbo={last.hdg}°")
+    print()
+
+    if args.device_id:
+        device_id = ObjectId(args.device_id)
+        device = db.devices.find_one({"_id": device_id}, {"serialNumber": 1})
+        print(f"CRUCE CONTRA devices_messages (Device {device_id}):")
+        if not device:
+            print("   ERROR: Device no encontrado!")
+            return 1
+        stored, missing = cross_check(db, device_id, by_device.get(device.get("serialNumber"), []))
+        print(f"   Guardadas: {len(stored)}")
+        print(f"   Faltantes: {len(missing)}")
+        for loc in missing[:10]:
+            print(f"     - {loc.dt} lat={loc.lat} lon={loc.lon}")
+        print()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
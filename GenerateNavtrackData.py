@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Generador de datos sintéticos de navtrack para benchmarks.
+
+Llena un mongod local con assets, devices, devices_connections (tramas GT06
+en puerto 7013 y JT/T 808 en puerto 7053, guardadas crudas en `m`) y
+devices_messages (pos, md.did, cd) con la misma forma que escribe el Listener.
+
+Cada device tiene su propia línea de tiempo: sus conexiones se abren en su
+puerto (7013 para GT06, 7053 para JT/T 808) justo antes de los mensajes que
+llevan su cid, así el conteo por puerto y el cruce conexión ↔ device son
+consistentes.
+
+Los datos son reproducibles: cada bloque usa Random(seed + índice de bloque),
+así que la misma escala y semilla producen la misma base, aun en paralelo.
+
+Uso:
+    python3 GenerateNavtrackData.py --scale 100000 [--uri mongodb://localhost:27017]
+        [--db navtrack_bench] [--seed 1] [--workers 4] [--drop]
+"""
+import argparse
+import math
+import random
+import struct
+import sys
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+GT06_PORT = 7013
+JT808_PORT = 7053
+BLOCK_SIZE = 10_000
+
+# Base de fechas fija para que los datos sean reproducibles
+EPOCH = datetime(2025, 1, 1)
+# Intervalo entre mensajes de un mismo device
+MESSAGE_SECONDS = 10
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def crc_itu(data):
+    """CRC-ITU (CRC-16/X25) usado por GT06/Concox."""
+    crc = 0xFFFF
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x8408 if crc & 1 else crc >> 1
+    return crc ^ 0xFFFF
+
+
+def to_bcd(digits, size):
+    """Convierte un string de dígitos a BCD de `size` bytes (con padding de ceros)."""
+    return bytes.fromhex(digits.rjust(size * 2, "0"))
+
+
+def gt06_frame(protocol, content, serial):
+    """Trama GT06: 78 78 [Len] [Protocol] [Content] [Serial 2B] [CRC 2B] 0D 0A"""
+    packet = bytes([len(content) + 5, protocol]) + content + struct.pack(">H", serial)
+    return b"\x78\x78" + packet + struct.pack(">H", crc_itu(packet)) + b"\x0d\x0a"
+
+
+def gt06_login(imei, serial):
+    return gt06_frame(0x01, to_bcd(imei, 8), serial)
+
+
+def gt06_location(dt, lat, lon, speed, course, serial):
+    content = bytes([dt.year - 2000, dt.month, dt.day, dt.hour, dt.minute, dt.second, 0xC9])
+    # Coordenadas en unidades de 1/1,800,000 de minuto (lat * 60 * 30000)
+    content += struct.pack(">IIB", int(abs(lat) * 1_800_000), int(abs(lon) * 1_800_000), int(speed))
+    status = 0x1000 | (0x0400 if lat >= 0 else 0) | (0x0800 if lon < 0 else 0) | (course & 0x03FF)
+    content += struct.pack(">H", status) + bytes(8)
+    return gt06_frame(0x12, content, serial)
+
+
+def jt808_frame(msg_id, device_id, seq, body):
+    """Trama JT/T 808 con escape y checksum, delimitada por 0x7E."""
+    data = struct.pack(">HH", msg_id, len(body) & 0x03FF) + to_bcd(device_id, 6) + struct.pack(">H", seq) + body
+    checksum = 0
+    for b in data:
+        checksum ^= b
+    data += bytes([checksum])
+    return b"\x7e" + data.replace(b"\x7d", b"\x7d\x01").replace(b"\x7e", b"\x7d\x02") + b"\x7e"
+
+
+def jt808_location_body(dt, lat, lon, speed, heading):
+    status = 0x02 | (0x08 if lat < 0 else 0) | (0x04 if lon < 0 else 0)
+    return struct.pack(
+        ">IIIIHHH", 0, status, int(abs(lat) * 1_000_000), int(abs(lon) * 1_000_000),
+        2240, int(speed * 10), heading,
+    ) + bytes.fromhex(dt.strftime("%y%m%d%H%M%S"))
+
+
+def jt808_batch_body(items):
+    return struct.pack(">HB", len(items), 1) + b"".join(struct.pack(">H", len(i)) + i for i in items)
+
+
+def object_id(kind, n, when=EPOCH):
+    """
+    ObjectId determinista: los 4 bytes iniciales son el timestamp de `when`
+    (el cd del documento; EPOCH para assets y devices, que no tienen cd), como
+    los genera el driver, seguidos de 1 byte de tipo y 7 de índice. Así el
+    orden por _id sigue a cd y ObjectId.from_datetime encuentra los documentos.
+    """
+    from bson import ObjectId
+    seconds = int((when - UNIX_EPOCH).total_seconds())
+    return ObjectId(struct.pack(">IQ", seconds, kind << 56 | n))
+
+
+ASSET, DEVICE, CONNECTION, MESSAGE = 1, 2, 3, 4
+
+
+def plan(scale):
+    """
+    Cantidad de documentos por colección para una escala total dada. Las
+    conexiones son un múltiplo de los devices: todos tienen la misma cantidad.
+    """
+    devices = max(10, scale // 1000)
+    connections = max(1, scale // 5 // devices) * devices
+    messages = max(devices, scale - devices * 2 - connections)
+    return {"assets": devices, "devices": devices, "devices_connections": connections,
+            "devices_messages": messages}
+
+
+def device_info(n):
+    """Datos fijos de un device: la mitad GT06 y la mitad JT/T 808."""
+    gt06 = n % 2 == 0
+    serial = f"{(18_404_228_323 + n) % 10**15}"
+    return gt06, serial, GT06_PORT if gt06 else JT808_PORT
+
+
+def timeline(counts):
+    """(conexiones, muestras) de cada device."""
+    devices = counts["devices"]
+    return counts["devices_connections"] // devices, -(-counts["devices_messages"] // devices)
+
+
+def message_cd(d, t):
+    """cd de la muestra t del device d."""
+    return EPOCH + timedelta(seconds=t * MESSAGE_SECONDS + d % 10)
+
+
+def connection_of(t, counts):
+    """Conexión (índice k del device) que lleva la muestra t."""
+    per_device, samples = timeline(counts)
+    return t * per_device // samples
+
+
+def connection_start(k, counts):
+    """Primera muestra de la conexión k: la menor t con connection_of(t) == k."""
+    per_device, samples = timeline(counts)
+    return (k * samples + per_device - 1) // per_device
+
+
+def connection_cd(d, k, counts):
+    """La conexión k del device d se abre 5 segundos antes de su primer mensaje."""
+    return message_cd(d, connection_start(k, counts)) - timedelta(seconds=5)
+
+
+def build_assets(start, count, rnd, counts):
+    for n in range(start, start + count):
+        gt06, serial, port = device_info(n)
+        yield {
+            "_id": object_id(ASSET, n),
+            "n": f"Asset {n}",
+            "d": {"sn": serial, "dti": "200" if gt06 else "7053"},
+            "device": {"_id": object_id(DEVICE, n), "serialNumber": serial,
+                       "deviceTypeId": "200" if gt06 else "7053", "protocolPort": port},
+            "name": f"Asset {n}",
+        }
+
+
+def build_devices(start, count, rnd, counts):
+    for n in range(start, start + count):
+        gt06, serial, port = device_info(n)
+        yield {
+            "_id": object_id(DEVICE, n),
+            "aid": object_id(ASSET, n), "assetId": object_id(ASSET, n),
+            "sn": serial, "serialNumber": serial,
+            "deviceTypeId": "200" if gt06 else "7053",
+        }
+
+
+def build_connections(start, count, rnd, counts):
+    from bson import Binary
+    devices = counts["devices"]
+    for n in range(start, start + count):
+        d, k = n % devices, n // devices
+        gt06, serial, port = device_info(d)
+        cd = connection_cd(d, k, counts)
+        t = connection_start(k, counts)
+        samples = range(t, t + rnd.randrange(1, 6))
+        if gt06:
+            frames = [gt06_login(serial, 1)] + [
+                gt06_location(message_cd(d, x), *track_point(d, x), rnd.randrange(360), i + 2)
+                for i, x in enumerate(samples)
+            ]
+        else:
+            frames = [jt808_frame(0x0100, serial, 1, bytes(37))]
+            if k > 0 and rnd.random() < 0.2:
+                # Posiciones acumuladas mientras el device estuvo sin conexión
+                backlog = range(max(t - rnd.randrange(5, 40), 0), t)
+                items = [jt808_location_body(message_cd(d, x), *track_point(d, x), rnd.randrange(360))
+                         for x in backlog]
+                frames.append(jt808_frame(0x0704, serial, 2, jt808_batch_body(items)))
+            frames += [
+                jt808_frame(0x0200, serial, i + 3, jt808_location_body(
+                    message_cd(d, x), *track_point(d, x), rnd.randrange(360)))
+                for i, x in enumerate(samples)
+            ]
+        yield {
+            "_id": object_id(CONNECTION, n, cd),
+            "cd": cd, "pp": port, "ip": f"10.{d % 256}.{k % 256}.{rnd.randrange(1, 255)}",
+            "md": {"did": object_id(DEVICE, d)},
+            "m": [Binary(f) for f in frames],
+        }
+
+
+def track_point(d, t):
+    """
+    Posición determinista del device d en la muestra t: recorre un circuito
+    alrededor de su base y se detiene 1 de cada 3 tramos de 100 muestras,
+    así los datos tienen viajes y paradas reconocibles.
+    """
+    stopped = (t // 100) % 3 == 0
+    moving = t - (t // 100 + 2) // 3 * 100 if not stopped else (t // 300) * 200
+    angle = moving / 200.0
+    lat = 19.0 + (d % 100) * 0.01 + 0.05 * math.sin(angle)
+    lon = -99.5 + (d // 100 % 100) * 0.01 + 0.05 * math.cos(angle)
+    return lat, lon, 0.0 if stopped else 30.0 + (t % 7) * 5.0
+
+
+def build_messages(start, count, rnd, counts):
+    devices = counts["devices"]
+    for n in range(start, start + count):
+        d, t = n % devices, n // devices
+        cd = message_cd(d, t)
+        k = connection_of(t, counts)
+        lat, lon, speed = track_point(d, t)
+        valid = rnd.random() > 0.05
+        yield {
+            "_id": object_id(MESSAGE, n, cd),
+            "md": {"aid": object_id(ASSET, d), "did": object_id(DEVICE, d)},
+            "cid": object_id(CONNECTION, k * devices + d, connection_cd(d, k, counts)),
+            "cd": cd,
+            "pos": {"c": [lon, lat], "d": cd - timedelta(seconds=rnd.randrange(3)),
+                    "spd": speed if valid else None,
+                    "hea": float(rnd.randrange(360)), "alt": 2240.0, "v": valid},
+        }
+
+
+BUILDERS = {
+    "assets": build_assets,
+    "devices": build_devices,
+    "devices_connections": build_connections,
+    "devices_messages": build_messages,
+}
+
+INDEXES = {
+    "devices": [[("aid", 1)]],
+    "devices_connections": [[("pp", 1), ("cd", -1)]],
+    "devices_messages": [[("md.did", 1), ("cd", -1)], [("md.aid", 1), ("cd", -1)], [("md.did", 1), ("pos.d", 1)]],
+}
+
+
+# Base de datos del proceso del pool: un MongoClient por worker, no por bloque
+_worker_db = None
+
+
+def init_worker(uri, db_name):
+    """Initializer del pool: abre el MongoClient que reutilizan todos los bloques del proceso."""
+    global _worker_db
+    from pymongo import MongoClient
+    _worker_db = MongoClient(uri)[db_name]
+
+
+def insert_block(task):
+    """Inserta un bloque de documentos; se ejecuta en un proceso del pool."""
+    collection, block, total, seed, counts = task
+    start = block * BLOCK_SIZE
+    count = min(BLOCK_SIZE, total - start)
+    rnd = random.Random(seed * 1_000_003 + block)
+    docs = list(BUILDERS[collection](start, count, rnd, counts))
+    _worker_db[collection].insert_many(docs, ordered=False)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera una base navtrack sintética")
+    parser.add_argument("--scale", type=int, default=10_000, help="documentos totales (10k a 100M)")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="navtrack_bench")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--drop", action="store_true", help="borra las colecciones antes de generar")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    counts = plan(args.scale)
+    client = MongoClient(args.uri)
+    db = client[args.db]
+
+    print("=" * 80)
+    print(f"GENERACION DE DATOS SINTETICOS - {args.db} (escala {args.scale:,})")
+    print("=" * 80)
+    print()
+
+    if args.drop:
+        for collection in counts:
+            db.drop_collection(collection)
+
+    started = time.perf_counter()
+    with Pool(args.workers, initializer=init_worker, initargs=(args.uri, args.db)) as pool:
+        for collection, total in counts.items():
+            t = time.perf_counter()
+            blocks = (total + BLOCK_SIZE - 1) // BLOCK_SIZE
+            tasks = [(collection, b, total, args.seed, counts) for b in range(blocks)]
+            inserted = sum(pool.imap_unordered(insert_block, tasks))
+            for keys in INDEXES.get(collection, []):
+                db[collection].create_index(keys)
+            print(f"   {collection}: {inserted:,} documentos en {time.perf_counter() - t:.1f}s")
+
+    print()
+    print(f"Total: {sum(counts.values()):,} documentos en {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
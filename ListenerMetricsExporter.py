@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Exportador de métricas Prometheus de la salud del Listener (puertos 7013/7053).
+
+El hilo principal consulta MongoDB cada --interval segundos y avanza watermarks de _id
+sobre devices_connections y devices_messages: cada ciclo solo lee los
+documentos nuevos desde el último _id visto. El Listener genera los ObjectId
+en el cliente desde handlers concurrentes, así que un _id menor puede quedar
+guardado después de uno mayor: los watermarks solo avanzan hasta
+WATERMARK_DELAY_SECONDS antes de la hora actual. El endpoint /metrics sirve el
+último texto generado en memoria, así un scrape nunca dispara consultas.
+
+El Listener inserta la conexión sin tramas y luego les hace $push a `m`, así
+que las fallas de decodificación no se pueden contar una sola vez al ver el
+_id. Las conexiones abiertas se siguen con la cantidad de tramas ya
+revisadas: cada ciclo lee el $size de `m` y, para las que crecieron,
+únicamente las tramas nuevas con {"m": {"$slice": [revisadas, nuevas]}}.
+Calcular $size obliga a MongoDB a cargar el documento completo, así que una
+conexión deja de seguirse tras IDLE_POLLS ciclos sin tramas nuevas o al
+superar --open-minutes; solo las conexiones activas cuestan en cada ciclo.
+
+Los mensajes se asocian a su puerto por cid; los cid que no están en caché
+(conexiones abiertas antes del arranque) se resuelven con un solo $in por
+lote. Los devices nuevos se detectan con otro watermark de _id.
+
+Métricas:
+    navtrack_connections_total{port}          conexiones recibidas
+    navtrack_connections_per_second{port}     tasa del último ciclo
+    navtrack_messages_stored_total{port}      mensajes guardados
+    navtrack_messages_stored_per_second{port} tasa del último ciclo
+    navtrack_decode_failures_total{port}      tramas crudas mal formadas
+    navtrack_devices_without_fix              devices sin posición válida en --stale-minutes
+    navtrack_ingest_lag_seconds               promedio de cd - pos.d del último ciclo
+    navtrack_last_message_age_seconds         antigüedad del último mensaje guardado
+
+Uso:
+    python3 ListenerMetricsExporter.py [--uri mongodb://...] [--listen 0.0.0.0:9108]
+        [--interval 15] [--stale-minutes 30] [--lookback-hours 24] [--open-minutes 30]
+"""
+import argparse
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from DecodeW2jBatch import FrameError, parse_frame
+
+PORTS = (7013, 7053)
+BATCH_SIZE = 5000
+# Máximo de conexiones recordadas para asociar mensajes (cid) a su puerto
+CONNECTION_CACHE_SIZE = 200_000
+# Los documentos más nuevos que esto se leen en el ciclo siguiente, para no
+# saltar inserciones concurrentes con un _id menor que aún no se guardaban
+WATERMARK_DELAY_SECONDS = 10
+# Ciclos seguidos sin tramas nuevas tras los que una conexión se da por cerrada
+IDLE_POLLS = 4
+
+
+def gt06_frame_ok(frame):
+    """Validación de estructura GT06: inicio 78 78 / 79 79, largo y fin 0D 0A."""
+    if len(frame) < 7 or frame[-2:] != b"\x0d\x0a":
+        return False
+    if frame[:2] == b"\x78\x78":
+        return frame[2] + 5 == len(frame)
+    if frame[:2] == b"\x79\x79":
+        return (frame[2] << 8 | frame[3]) + 6 == len(frame)
+    return False
+
+
+def jt808_frame_ok(frame):
+    try:
+        parse_frame(frame)
+        return True
+    except FrameError:
+        return False
+
+
+FRAME_VALIDATORS = {7013: gt06_frame_ok, 7053: jt808_frame_ok}
+
+
+class ListenerMetrics:
+    """Estado incremental de las métricas; solo lo modifica el hilo de polling."""
+
+    def __init__(self, db, ports=PORTS, stale_minutes=30, lookback_hours=24, open_minutes=30):
+        self.db = db
+        self.ports = ports
+        self.stale = timedelta(minutes=stale_minutes)
+        self.lookback = timedelta(hours=lookback_hours)
+        self.open_window = timedelta(minutes=open_minutes)
+
+        self.connections_total = defaultdict(int)
+        self.messages_total = defaultdict(int)
+        self.decode_failures_total = defaultdict(int)
+        self.connections_rate = defaultdict(float)
+        self.messages_rate = defaultdict(float)
+        self.last_fix = {}
+        self.ingest_lag = None
+        self.last_message_cd = None
+
+        self.connection_port = OrderedDict()
+        # _id -> [puerto, tramas ya revisadas, ciclos sin tramas nuevas] de las
+        # conexiones que aún reciben tramas
+        self.open_connections = OrderedDict()
+        self.devices_watermark = None
+        self.connections_watermark = None
+        self.messages_watermark = None
+        self.last_poll = None
+
+        self._lock = threading.Lock()
+        self._text = b""
+
+    def bootstrap(self):
+        """
+        Carga inicial: devices conocidos, última posición válida de cada uno
+        dentro de --lookback-hours, conexiones abiertas (sin contar sus tramas
+        previas) y watermarks WATERMARK_DELAY_SECONDS antes de la hora actual.
+        """
+        from bson import ObjectId
+
+        now = datetime.utcnow()
+        since = now - self.lookback
+        self.last_fix = {d["_id"]: None for d in self.db.devices.find({}, {"_id": 1})}
+        # Lo anterior al corte se da por visto; el primer ciclo lee desde ahí
+        watermark = ObjectId.from_datetime(now - timedelta(seconds=WATERMARK_DELAY_SECONDS))
+        self.devices_watermark = self.connections_watermark = self.messages_watermark = watermark
+        for doc in self.db.devices_messages.aggregate([
+            {"$match": {"_id": {"$gte": ObjectId.from_datetime(since)}, "pos.v": True}},
+            {"$group": {"_id": "$md.did", "cd": {"$max": "$cd"}}},
+        ]):
+            self.last_fix[doc["_id"]] = doc["cd"]
+
+        for conn in self.db.devices_connections.aggregate([
+            # Las posteriores al watermark las lee completas el primer ciclo
+            {"$match": {"_id": {"$gte": ObjectId.from_datetime(now - self.open_window), "$lt": watermark},
+                        "pp": {"$in": list(FRAME_VALIDATORS)}}},
+            {"$sort": {"_id": 1}},
+            {"$project": {"pp": 1, "n": {"$size": {"$ifNull": ["$m", []]}}}},
+        ]):
+            self.connection_port[conn["_id"]] = conn["pp"]
+            self.open_connections[conn["_id"]] = [conn["pp"], conn["n"], 0]
+        self._trim_caches()
+
+        newest_message = self.db.devices_messages.find_one({}, {"_id": 1, "cd": 1}, sort=[("_id", -1)])
+        self.last_message_cd = newest_message.get("cd") if newest_message else None
+        self.last_poll = time.monotonic()
+        self.render()
+
+    def _new_batches(self, collection, watermark, projection):
+        """
+        Lotes de hasta BATCH_SIZE documentos con _id > watermark y anteriores a
+        WATERMARK_DELAY_SECONDS, en orden de _id.
+        """
+        from bson import ObjectId
+
+        until = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=WATERMARK_DELAY_SECONDS))
+        while True:
+            batch = list(collection.find({"_id": {"$gt": watermark, "$lt": until}}, projection)
+                         .sort("_id", 1).limit(BATCH_SIZE))
+            if batch:
+                yield batch
+            if len(batch) < BATCH_SIZE:
+                return
+            watermark = batch[-1]["_id"]
+
+    def _new_documents(self, collection, watermark, projection):
+        for batch in self._new_batches(collection, watermark, projection):
+            yield from batch
+
+    def _count_failures(self, port, frames):
+        validator = FRAME_VALIDATORS[port]
+        self.decode_failures_total[port] += sum(1 for m in frames if not validator(bytes(m)))
+
+    def _check_open_connections(self):
+        """
+        Revisa solo las tramas agregadas desde el último ciclo a las conexiones
+        abiertas: primero el $size de `m` y luego un $slice por cada cantidad
+        de tramas ya revisadas, para no volver a leer las tramas viejas. Las
+        conexiones inactivas por IDLE_POLLS ciclos (o borradas) dejan de seguirse.
+        """
+        from bson import ObjectId
+
+        cutoff = ObjectId.from_datetime(datetime.utcnow() - self.open_window)
+        while self.open_connections and next(iter(self.open_connections)) < cutoff:
+            self.open_connections.popitem(last=False)
+
+        grown = defaultdict(list)  # tramas revisadas -> [(_id, tramas actuales)]
+        idle = set(self.open_connections)
+        ids = list(self.open_connections)
+        for i in range(0, len(ids), BATCH_SIZE):
+            for conn in self.db.devices_connections.aggregate([
+                {"$match": {"_id": {"$in": ids[i:i + BATCH_SIZE]}}},
+                {"$project": {"n": {"$size": {"$ifNull": ["$m", []]}}}},
+            ]):
+                state = self.open_connections[conn["_id"]]
+                if conn["n"] > state[1]:
+                    grown[state[1]].append((conn["_id"], conn["n"]))
+                    idle.discard(conn["_id"])
+                    state[2] = 0
+
+        for cid in idle:
+            state = self.open_connections[cid]
+            state[2] += 1
+            if state[2] >= IDLE_POLLS:
+                del self.open_connections[cid]
+
+        for checked, sizes in grown.items():
+            for conn in self.db.devices_connections.find(
+                    {"_id": {"$in": [cid for cid, _ in sizes]}},
+                    {"m": {"$slice": [checked, max(n for _, n in sizes) - checked]}}):
+                state = self.open_connections[conn["_id"]]
+                frames = conn.get("m") or []
+                self._count_failures(state[0], frames)
+                state[1] = checked + len(frames)
+
+    def _resolve_ports(self, cids):
+        """Agrega al caché el puerto de los cid desconocidos con una sola consulta $in."""
+        missing = [cid for cid in cids if cid is not None and cid not in self.connection_port]
+        if missing:
+            for conn in self.db.devices_connections.find({"_id": {"$in": missing}}, {"pp": 1}):
+                self.connection_port[conn["_id"]] = conn.get("pp")
+
+    def _trim_caches(self):
+        while len(self.connection_port) > CONNECTION_CACHE_SIZE:
+            self.connection_port.popitem(last=False)
+        while len(self.open_connections) > CONNECTION_CACHE_SIZE:
+            self.open_connections.popitem(last=False)
+
+    def poll(self):
+        """Un ciclo: procesa devices, conexiones y mensajes nuevos y regenera el texto."""
+        now = time.monotonic()
+        elapsed = max(now - self.last_poll, 1e-9)
+        self.last_poll = now
+
+        for device in self._new_documents(self.db.devices, self.devices_watermark, {"_id": 1}):
+            self.devices_watermark = device["_id"]
+            self.last_fix.setdefault(device["_id"], None)
+
+        # Antes de leer las conexiones nuevas, que se revisan completas más abajo
+        self._check_open_connections()
+
+        connections = defaultdict(int)
+        for conn in self._new_documents(self.db.devices_connections, self.connections_watermark,
+                                        {"pp": 1, "m": 1}):
+            self.connections_watermark = conn["_id"]
+            port = conn.get("pp")
+            connections[port] += 1
+            self.connections_total[port] += 1
+            self.connection_port[conn["_id"]] = port
+            if port in FRAME_VALIDATORS:
+                frames = conn.get("m") or []
+                self._count_failures(port, frames)
+                self.open_connections[conn["_id"]] = [port, len(frames), 0]
+
+        messages = defaultdict(int)
+        lag_sum, lag_count = 0.0, 0
+        for batch in self._new_batches(self.db.devices_messages, self.messages_watermark,
+                                       {"cid": 1, "cd": 1, "md.did": 1, "pos.d": 1, "pos.v": 1}):
+            self._resolve_ports({msg.get("cid") for msg in batch})
+            for msg in batch:
+                self.messages_watermark = msg["_id"]
+                port = self.connection_port.get(msg.get("cid"), "unknown")
+                messages[port] += 1
+                self.messages_total[port] += 1
+
+                cd, pos = msg.get("cd"), msg.get("pos") or {}
+                if cd:
+                    self.last_message_cd = cd
+                    if pos.get("d"):
+                        lag_sum += (cd - pos["d"]).total_seconds()
+                        lag_count += 1
+                did = (msg.get("md") or {}).get("did")
+                if did is not None and pos.get("v") and cd:
+                    self.last_fix[did] = cd
+        self._trim_caches()
+
+        # Los totales se acumulan documento a documento (junto con el watermark)
+        # para que un error a mitad de ciclo no pierda ni duplique conteos
+        for port in set(self.ports) | set(self.connections_total):
+            self.connections_rate[port] = connections[port] / elapsed
+        for port in set(self.ports) | set(self.messages_total):
+            self.messages_rate[port] = messages[port] / elapsed
+        self.ingest_lag = lag_sum / lag_count if lag_count else None
+
+        self.render()
+
+    def render(self):
+        """Genera el texto de exposición de Prometheus y lo publica para los scrapes."""
+        now = datetime.utcnow()
+        stale_before = now - self.stale
+        without_fix = sum(1 for cd in self.last_fix.values() if cd is None or cd < stale_before)
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+                lines.append(f"{name}{label_text} {value}")
+
+        def by_port(values):
+            return [({"port": port}, values[port]) for port in sorted(values, key=str)]
+
+        metric("navtrack_connections_total", "counter", "Conexiones recibidas por puerto.",
+               by_port(self.connections_total))
+        metric("navtrack_connections_per_second", "gauge", "Conexiones por segundo en el último ciclo.",
+               by_port(self.connections_rate))
+        metric("navtrack_messages_stored_total", "counter", "Mensajes guardados por puerto.",
+               by_port(self.messages_total))
+        metric("navtrack_messages_stored_per_second", "gauge", "Mensajes guardados por segundo en el último ciclo.",
+               by_port(self.messages_rate))
+        metric("navtrack_decode_failures_total", "counter", "Tramas crudas mal formadas por puerto.",
+               by_port(self.decode_failures_total))
+        metric("navtrack_devices_without_fix", "gauge",
+               f"Devices sin posición válida en los últimos {int(self.stale.total_seconds() // 60)} minutos.",
+               [({}, without_fix)])
+        if self.ingest_lag is not None:
+            metric("navtrack_ingest_lag_seconds", "gauge", "Promedio de cd - pos.d en el último ciclo.",
+                   [({}, round(self.ingest_lag, 3))])
+        if self.last_message_cd is not None:
+            metric("navtrack_last_message_age_seconds", "gauge", "Antigüedad del último mensaje guardado.",
+                   [({}, round((now - self.last_message_cd).total_seconds(), 3))])
+
+        text = ("\n".join(lines) + "\n").encode()
+        with self._lock:
+            self._text = text
+
+    def exposition(self):
+        with self._lock:
+            return self._text
+
+
+def serve(metrics, host, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.exposition()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportador Prometheus de la salud del Listener")
+    parser.add_argument("--uri", default="mongodb://31.97.146.1:27017")
+    parser.add_argument("--db", default="navtrack")
+    parser.add_argument("--listen", default="0.0.0.0:9108")
+    parser.add_argument("--interval", type=float, default=15)
+    parser.add_argument("--stale-minutes", type=int, default=30)
+    parser.add_argument("--lookback-hours", type=int, default=24)
+    parser.add_argument("--open-minutes", type=float, default=30,
+                        help="máximo de minutos que se siguen revisando las tramas nuevas de una conexión")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+
+    db = MongoClient(args.uri)[args.db]
+    metrics = ListenerMetrics(db, stale_minutes=args.stale_minutes, lookback_hours=args.lookback_hours,
+                              open_minutes=args.open_minutes)
+    metrics.bootstrap()
+
+    host, _, port = args.listen.rpartition(":")
+    serve(metrics, host or "0.0.0.0", int(port))
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Métricas en http://{args.listen}/metrics "
+          f"(actualiza cada {args.interval:g} segundos, presiona Ctrl+C para salir)")
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            try:
+                metrics.poll()
+            except Exception as e:
+                # Un error de red no debe tumbar el exportador: se reintenta en el próximo ciclo
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] ERROR consultando MongoDB: {e}")
+    except KeyboardInterrupt:
+        print("\n\nExportador detenido por el usuario.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
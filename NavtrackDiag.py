@@ -0,0 +1,828 @@
+#!/usr/bin/env python3
+"""
+CLI unificada de diagnóstico de navtrack.
+
+Reúne CheckAsset, CheckGT06, MonitorW2j, ValidateDB y AnalyzeConcoxIMEI en
+subcomandos que comparten un único MongoClient (y su pool de conexiones).
+pymongo/bson solo se importan cuando un subcomando necesita la base, y la URI
+y los IDs se toman de argumentos o del entorno:
+
+    NAVTRACK_MONGO_URI   URI de MongoDB (por defecto mongodb://31.97.146.1:27017)
+    NAVTRACK_DB          base de datos (por defecto navtrack)
+    NAVTRACK_ASSET_ID    asset por defecto de check-asset, check-port y validate
+    NAVTRACK_DEVICE_ID   device por defecto de monitor
+
+Uso:
+    python3 NavtrackDiag.py check-asset [ASSET_ID] [--port 7013]
+    python3 NavtrackDiag.py check-port [ASSET_ID] [--port 7013]
+    python3 NavtrackDiag.py monitor [DEVICE_ID] [--port 7053] [--interval 10]
+    python3 NavtrackDiag.py validate [ASSET_ID] [--port 7053]
+    python3 NavtrackDiag.py analyze-imei [HEX] [--serial 18404228323]
+    python3 NavtrackDiag.py shell [--file comandos.txt]
+
+El modo shell lee un subcomando por línea (de la terminal, de un archivo o de
+stdin) y los ejecuta todos con la misma conexión, para loops de cron.
+"""
+import argparse
+import os
+import shlex
+import sys
+import time
+from datetime import datetime
+
+DEFAULT_URI = "mongodb://31.97.146.1:27017"
+DEFAULT_DB = "navtrack"
+
+JT808_MESSAGE_TYPES = {
+    0x0100: "Terminal Registration",
+    0x0102: "Terminal Authentication",
+    0x0002: "Terminal Heartbeat",
+    0x0200: "Location Report",
+    0x0704: "Batch Location Report",
+}
+
+_clients = {}
+
+
+def get_db(uri=None, name=None):
+    """
+    Base de datos sobre un MongoClient compartido por URI. El client se crea
+    una sola vez por proceso, así los subcomandos del modo shell reutilizan
+    el mismo pool de conexiones.
+    """
+    uri = uri or os.environ.get("NAVTRACK_MONGO_URI", DEFAULT_URI)
+    name = name or os.environ.get("NAVTRACK_DB", DEFAULT_DB)
+    if uri not in _clients:
+        from pymongo import MongoClient
+        _clients[uri] = MongoClient(uri)
+    return _clients[uri][name]
+
+
+def object_id(value, env):
+    """ObjectId desde argumento o variable de entorno."""
+    from bson import ObjectId
+
+    value = value or os.environ.get(env)
+    if not value:
+        raise SystemExit(f"ERROR: falta el ID (argumento o variable {env})")
+    return ObjectId(value)
+
+
+# Utilidades de parsing de tramas crudas (devices_connections.m)
+
+def hex_preview(frame, size):
+    """Primeros `size` bytes en hex separados por espacio."""
+    return frame[:size].hex(" ").upper()
+
+
+def gt06_imei(frame):
+    """IMEI de un login GT06 (78 78 [Len] 01 [IMEI 8B] ...) o None."""
+    if frame[:2] == b"\x78\x78" and len(frame) >= 12 and frame[2] >= 13 and frame[3] == 0x01:
+        return frame[4:12].hex().upper()
+    return None
+
+
+def jt808_device_id(frame):
+    """Device ID BCD de una trama JT/T 808 (completo, sin leading zeros) o None."""
+    if len(frame) >= 12 and frame[0] == 0x7E:
+        bcd = frame[5:11].hex()
+        return bcd, bcd.lstrip("0")
+    return None
+
+
+def jt808_message_id(frame):
+    """MsgID de una trama JT/T 808 guardada con el 0x7E inicial."""
+    return (frame[1] << 8) | frame[2]
+
+
+def jt808_message_type(msg_id):
+    name = JT808_MESSAGE_TYPES.get(msg_id)
+    return f"{name} (0x{msg_id:04X})" if name else f"Unknown (0x{msg_id:04X})"
+
+
+def print_position(pos, indent, heading=False):
+    print(f"{indent}Ubicación:")
+    print(f"{indent}  Latitud:  {pos.get('lat', 'N/A')}")
+    print(f"{indent}  Longitud: {pos.get('lon', 'N/A')}")
+    print(f"{indent}  Velocidad: {pos.get('spd', 'N/A')} km/h")
+    if heading:
+        print(f"{indent}  Rumbo: {pos.get('hdg', 'N/A')}°")
+    print(f"{indent}  Válido: {pos.get('v', False)}")
+
+
+# Subcomandos
+
+def check_asset(args):
+    from NavtrackQueries import run_parallel, recent_connections, recent_messages
+
+    db = get_db(args.uri, args.db)
+    asset_id = object_id(args.asset_id, "NAVTRACK_ASSET_ID")
+    port = args.port
+
+    print("=" * 80)
+    print(f"VALIDACION DE ASSET: {asset_id}")
+    print("=" * 80)
+    print()
+
+    # Las secciones no dependen entre sí: se consultan en paralelo (~1 round trip).
+    # Los mensajes se buscan por md.aid para no esperar al Device, así que
+    # incluyen los de cualquier device que haya tenido el asset.
+    results = run_parallel({
+        "asset": lambda: db.assets.find_one({"_id": asset_id}),
+        "device": lambda: db.devices.find_one({"aid": asset_id}),
+        "connections": lambda: recent_connections(db, port, args.limit),
+        "messages": lambda: recent_messages(db, {"md.aid": asset_id}, 5),
+    })
+
+    # 1. Verificar Asset
+    print("1. ASSET CONFIGURADO:")
+    asset = results["asset"]
+    if not asset:
+        print("   ERROR: Asset no encontrado!")
+        return 1
+
+    print(f"   ID: {asset['_id']}")
+    print(f"   Nombre: {asset.get('n', 'N/A')}")
+    print()
+    print("   Estructura completa del Asset:")
+    for key, value in asset.items():
+        if key != '_id':
+            print(f"     {key}: {value}")
+
+    serial_number = None
+    device_type_id = None
+    if asset.get('d'):
+        serial_number = asset['d'].get('sn', None)
+        device_type_id = asset['d'].get('dti', None)
+        print()
+        print(f"   Serial Number (d.sn): {serial_number}")
+        print(f"   Device Type ID (d.dti): {device_type_id}")
+    print()
+
+    # 2. Verificar Device asociado
+    print("2. DEVICE ASOCIADO:")
+    device = results["device"]
+    device_id = None
+    if device:
+        device_id = device["_id"]
+        print(f"   Device ID: {device_id}")
+        print(f"   Serial Number: {device.get('sn', 'N/A')}")
+        print()
+        print("   Estructura completa del Device:")
+        for key, value in device.items():
+            if key == '_id':
+                continue
+            print(f"     {key}: (bytes)" if isinstance(value, bytes) else f"     {key}: {value}")
+    else:
+        print("   No hay device asociado")
+    print()
+
+    # 3. Conexiones recientes en el puerto
+    print(f"3. CONEXIONES RECIENTES EN PUERTO {port}:")
+    if serial_number:
+        print(f"   Buscando conexiones con serial: {serial_number}")
+
+    connections = results["connections"]
+    if connections:
+        print(f"   Se encontraron {len(connections)} conexiones recientes en puerto {port}:")
+        print()
+        for i, conn in enumerate(connections, 1):
+            print(f"   Conexión #{i}:")
+            print(f"     ID: {conn['_id']}")
+            print(f"     Fecha: {conn.get('cd', 'N/A')}")
+            print(f"     IP: {conn.get('ip', 'N/A')}")
+            print(f"     Puerto Protocolo: {conn.get('pp', 'N/A')}")
+
+            conn_device_id = (conn.get('md') or {}).get('did')
+            if conn_device_id:
+                print(f"     Device ID de la conexión: {conn_device_id}")
+                if device_id and conn_device_id == device_id:
+                    print(f"     ✓ MATCH: Esta conexión pertenece a este Asset!")
+
+            if conn.get('m'):
+                print(f"     Mensajes raw: {conn['n']}")
+                first_msg = bytes(conn['m'][0])
+                print(f"     Primer mensaje: {hex_preview(first_msg, 30)}")
+
+                imei = gt06_imei(first_msg)
+                jt808 = jt808_device_id(first_msg) if not imei else None
+                if imei:
+                    print(f"     IMEI (GT06): {imei}")
+                elif jt808:
+                    print(f"     Device ID (JT808): {jt808[0].upper()}")
+            else:
+                print(f"     Mensajes: 0")
+            print()
+    else:
+        print(f"   No se encontraron conexiones en puerto {port}")
+        print()
+
+    # 4. Verificar mensajes guardados
+    print("4. MENSAJES GUARDADOS:")
+    messages = results["messages"] if device_id else []
+    if device_id:
+        print(f"   Buscando mensajes del Asset ID: {asset_id} (md.aid)")
+        print(f"   Total de mensajes guardados: {len(messages)}")
+        print()
+        if messages:
+            print("   ULTIMOS MENSAJES:")
+            for i, msg in enumerate(messages, 1):
+                print(f"   Mensaje #{i}:")
+                print(f"     ID: {msg['_id']}")
+                print(f"     Fecha: {msg.get('cd', 'N/A')}")
+                if msg.get('pos'):
+                    print_position(msg['pos'], "     ")
+                else:
+                    print(f"     Sin datos de ubicación")
+                print()
+        else:
+            print("   No hay mensajes guardados aún")
+            print()
+    else:
+        print("   No hay Device asociado, no se pueden buscar mensajes")
+        print()
+
+    # 5. Resumen
+    print("=" * 80)
+    print("RESUMEN:")
+    print("=" * 80)
+
+    if device_id and connections:
+        has_match = any((conn.get('md') or {}).get('did') == device_id for conn in connections)
+        if has_match:
+            print("STATUS: ✓ DISPOSITIVO CONECTADO")
+            print(f"  - Asset configurado correctamente")
+            print(f"  - Serial Number: {serial_number}")
+            print(f"  - Device Type ID: {device_type_id}")
+            print(f"  - Mensajes guardados: {len(messages)}")
+            if messages:
+                print("  - ✓ FUNCIONANDO CORRECTAMENTE")
+            else:
+                print("  - ⚠ Dispositivo conecta pero no envía ubicaciones")
+        else:
+            print("STATUS: ⚠ SIN MATCH")
+            print(f"  - Asset configurado con Serial: {serial_number}")
+            print(f"  - Hay conexiones en puerto {port} pero no coinciden con este Asset")
+            print(f"  - Verifica que el Serial Number sea correcto")
+    elif not device_id:
+        print("STATUS: ⚠ SIN DEVICE")
+        print(f"  - Asset existe pero no tiene Device asociado")
+        print(f"  - Serial configurado: {serial_number}")
+        print(f"  - Device Type: {device_type_id}")
+        print(f"  - El device se creará en la primera conexión exitosa")
+    else:
+        print("STATUS: ✗ SIN CONEXIONES")
+        print(f"  - Asset y Device configurados")
+        print(f"  - No hay conexiones recientes en puerto {port}")
+    print()
+    return 0
+
+
+def check_port(args):
+    from NavtrackQueries import run_parallel, recent_connections, recent_messages
+
+    db = get_db(args.uri, args.db)
+    asset_id = object_id(args.asset_id, "NAVTRACK_ASSET_ID")
+    port = args.port
+
+    print("=" * 80)
+    print(f"VALIDACION DE PROTOCOLO - PUERTO {port}")
+    print("=" * 80)
+    print()
+
+    # Las secciones no dependen entre sí: se consultan en paralelo (~1 round trip).
+    # Los mensajes se buscan por md.aid para no esperar al Device, así que
+    # incluyen los de cualquier device que haya tenido el asset.
+    results = run_parallel({
+        "asset": lambda: db.assets.find_one({"_id": asset_id}, {"n": 1, "d": 1, "sn": 1}),
+        "device": lambda: db.devices.find_one({"aid": asset_id}, {"sn": 1}),
+        "connections": lambda: recent_connections(db, port, args.limit),
+        "messages": lambda: recent_messages(db, {"md.aid": asset_id}, 5),
+    })
+
+    # 1. Verificar Asset
+    print("1. ASSET CONFIGURADO:")
+    asset = results["asset"]
+    if not asset:
+        print("   ERROR: Asset no encontrado!")
+        return 1
+
+    print(f"   ID: {asset['_id']}")
+    print(f"   Nombre: {asset.get('n', 'N/A')}")
+    serial_number = None
+    device_type_id = None
+    if asset.get('d'):
+        serial_number = asset['d'].get('sn', 'N/A')
+        device_type_id = asset['d'].get('dti')
+    elif 'sn' in asset:
+        serial_number = asset.get('sn', 'N/A')
+    print(f"   Serial Number: {serial_number}")
+    print(f"   Device Type ID: {device_type_id}")
+    if device_type_id:
+        print(f"   Device Type: (ID {device_type_id})")
+    print()
+
+    # 2. Verificar Device asociado
+    print("2. DEVICE ASOCIADO:")
+    device = results["device"]
+    device_id = None
+    if device:
+        device_id = device["_id"]
+        print(f"   Device ID: {device_id}")
+        print(f"   Serial Number: {device.get('sn', 'N/A')}")
+    else:
+        print("   No hay device asociado (se creará en la primera conexión)")
+    print()
+
+    # 3. Conexiones recientes en el puerto
+    print(f"3. CONEXIONES RECIENTES EN PUERTO {port}:")
+    connections = results["connections"]
+    if connections:
+        print(f"   Se encontraron {len(connections)} conexiones recientes:")
+        print()
+        for i, conn in enumerate(connections, 1):
+            print(f"   Conexión #{i}:")
+            print(f"     ID: {conn['_id']}")
+            print(f"     Fecha: {conn.get('cd', 'N/A')}")
+            print(f"     IP: {conn.get('ip', 'N/A')}")
+            print(f"     Puerto Protocolo: {conn.get('pp', 'N/A')}")
+            if conn.get('m'):
+                print(f"     Mensajes raw: {conn['n']}")
+                print(f"     Primer mensaje (primeros 20 bytes): {hex_preview(bytes(conn['m'][0]), 20)}")
+            else:
+                print(f"     Mensajes: 0")
+            print()
+    else:
+        print(f"   No se encontraron conexiones en puerto {port}")
+        print("   NOTA: Verifica que el dispositivo esté configurado correctamente")
+        print(f"         y que el Listener esté escuchando en el puerto {port}")
+        print()
+
+    # 4. Verificar mensajes guardados
+    print("4. MENSAJES GUARDADOS:")
+    if device_id:
+        messages = results["messages"]
+        print(f"   Buscando mensajes del Asset ID: {asset_id} (md.aid)")
+    else:
+        messages = []
+        print(f"   No hay Device ID aún, buscando solo conexiones...")
+    print(f"   Total de mensajes guardados: {len(messages)}")
+    print()
+    if messages:
+        print("   ULTIMOS MENSAJES:")
+        for i, msg in enumerate(messages, 1):
+            print(f"   Mensaje #{i}:")
+            print(f"     ID: {msg['_id']}")
+            print(f"     Fecha: {msg.get('cd', 'N/A')}")
+            if msg.get('pos'):
+                print_position(msg['pos'], "     ", heading=True)
+            else:
+                print(f"     Sin datos de ubicación")
+            print()
+
+    # 5. Resumen
+    print("=" * 80)
+    print("RESUMEN:")
+    print("=" * 80)
+    if connections and messages:
+        print("STATUS: ✓ FUNCIONANDO CORRECTAMENTE")
+        print(f"  - El dispositivo está conectándose en puerto {port}")
+        print("  - Los mensajes se están guardando en la base de datos")
+        print("  - Verifica la interfaz web para confirmar que aparece la ubicación")
+    elif connections:
+        print("STATUS: ⚠ PARCIAL")
+        print(f"  - El dispositivo se está conectando en puerto {port}")
+        print("  - PERO no se están guardando mensajes de ubicación")
+        print("  - Posible problema: Serial number no coincide o protocolo mal configurado")
+        print(f"  - Serial esperado: {serial_number}")
+        print("  - Revisa los logs del Listener para más detalles")
+    else:
+        print("STATUS: ✗ SIN CONEXIONES")
+        print(f"  - No se detectan conexiones en puerto {port}")
+        print(f"  - Verifica que el dispositivo esté configurado para usar el protocolo del puerto {port}")
+        print("  - Verifica que el Listener esté corriendo y escuchando en ese puerto")
+    print()
+    return 0
+
+
+def monitor(args):
+    from DecodeW2jBatch import iter_frames
+
+    db = get_db(args.uri, args.db)
+    device_id = object_id(args.device_id, "NAVTRACK_DEVICE_ID")
+    last_connection_id = None
+    last_message_count = 0
+
+    print("=" * 80)
+    print(f"MONITOREO EN TIEMPO REAL - PUERTO {args.port}")
+    print("=" * 80)
+    print()
+    print("Esperando que el dispositivo se conecte...")
+    print(f"(Actualiza cada {args.interval:g} segundos, presiona Ctrl+C para salir)")
+    print()
+
+    try:
+        while True:
+            conn = db.devices_connections.find_one({"pp": args.port}, {"cd": 1, "ip": 1, "m": 1},
+                                                   sort=[("cd", -1)])
+            if conn and conn["_id"] != last_connection_id:
+                last_connection_id = conn["_id"]
+                print(f"\n[{datetime.now().strftime('%H:%M:%S')}] NUEVA CONEXION DETECTADA")
+                print(f"  Connection ID: {conn['_id']}")
+                print(f"  Fecha: {conn['cd']}")
+                print(f"  IP: {conn.get('ip', 'N/A')}")
+
+                if conn.get('m'):
+                    messages = conn['m']
+                    print(f"  Mensajes en conexion: {len(messages)}")
+
+                    msg_types = []
+                    has_location = False
+                    for msg in messages:
+                        msg_bytes = bytes(msg)
+                        if len(msg_bytes) < 3:
+                            continue
+                        msg_id = jt808_message_id(msg_bytes)
+                        if msg_id == 0x0200:
+                            msg_types.append("LOCATION REPORT")
+                            has_location = True
+                        elif msg_id == 0x0704:
+                            batch = list(iter_frames([msg_bytes]))
+                            msg_types.append(f"Batch Location ({len(batch)} posiciones)")
+                            has_location = has_location or len(batch) > 0
+                        elif msg_id in JT808_MESSAGE_TYPES:
+                            msg_types.append(JT808_MESSAGE_TYPES[msg_id].replace("Terminal ", ""))
+                        else:
+                            msg_types.append(f"0x{msg_id:04X}")
+
+                    print(f"  Tipos: {' | '.join(msg_types)}")
+                    if has_location:
+                        print()
+                        print("  *** SUCCESS! MENSAJE DE UBICACION DETECTADO! ***")
+                        print()
+
+            msg_count = db.devices_messages.count_documents({"md.did": device_id})
+            if msg_count != last_message_count:
+                last_message_count = msg_count
+                print(f"\n[{datetime.now().strftime('%H:%M:%S')}] MENSAJES GUARDADOS: {msg_count}")
+
+                msg = db.devices_messages.find_one({"md.did": device_id}, {"pos": 1}, sort=[("cd", -1)])
+                if msg and msg.get('pos'):
+                    pos = msg['pos']
+                    print(f"  Ultima ubicacion:")
+                    print(f"    Latitud:  {pos.get('lat', 'N/A')}")
+                    print(f"    Longitud: {pos.get('lon', 'N/A')}")
+                    print(f"    Velocidad: {pos.get('spd', 'N/A')} km/h")
+                    print(f"    Rumbo: {pos.get('hdg', 'N/A')}°")
+                    print(f"    Fecha GPS: {pos.get('dt', 'N/A')}")
+                    print(f"    Valido: {pos.get('v', False)}")
+                    print()
+                    print("=" * 80)
+                    print("EL DISPOSITIVO ESTA FUNCIONANDO CORRECTAMENTE!")
+                    print("=" * 80)
+                    print()
+                    print("Puedes verificar en la interfaz web que la ubicacion aparece en el mapa.")
+                    print()
+                    return 0
+
+            time.sleep(args.interval)
+
+    except KeyboardInterrupt:
+        print("\n\nMonitoreo detenido por el usuario.")
+        print()
+        msg_count = db.devices_messages.count_documents({"md.did": device_id})
+        print(f"Resumen final:")
+        print(f"  Mensajes guardados: {msg_count}")
+        if msg_count > 0:
+            print("  Status: FUNCIONANDO CORRECTAMENTE")
+        else:
+            print("  Status: Esperando que el dispositivo envie ubicaciones")
+            print("          Asegurate de que el Listener este corriendo con el codigo actualizado")
+    return 0
+
+
+def validate(args):
+    from NavtrackQueries import run_parallel, recent_connections, recent_messages
+
+    db = get_db(args.uri, args.db)
+    asset_id = object_id(args.asset_id, "NAVTRACK_ASSET_ID")
+    port = args.port
+
+    print("=" * 80)
+    print(f"VALIDACIÓN COMPLETA DE LA BASE DE DATOS - PUERTO {port}")
+    print("=" * 80)
+
+    # Las secciones 1-3 no dependen entre sí: se consultan en paralelo (~1 round trip).
+    # Los mensajes se buscan por md.aid para no esperar al Device del Asset, así
+    # que incluyen los de cualquier device que haya tenido el asset.
+    results = run_parallel({
+        "asset": lambda: db.assets.find_one({"_id": asset_id}, {"name": 1, "device": 1}),
+        "connections": lambda: recent_connections(db, port, 5),
+        "message_count": lambda: db.devices_messages.count_documents({"md.aid": asset_id}),
+        "messages": lambda: recent_messages(db, {"md.aid": asset_id}, 3),
+    })
+
+    # 1. Verificar Asset
+    print("\n1. VERIFICACIÓN DEL ASSET")
+    print("-" * 80)
+    asset = results["asset"]
+    if not asset:
+        print(f"❌ ERROR: Asset no encontrado")
+        return 1
+    print(f"✅ Asset encontrado: {asset['name']}")
+    print(f"   Asset ID: {asset['_id']}")
+    if not asset.get('device'):
+        print("   ❌ ERROR: Asset no tiene Device configurado")
+        return 1
+
+    device = asset['device']
+    print(f"\n   Device configurado:")
+    print(f"   - Device ID: {device.get('_id', 'N/A')}")
+    print(f"   - Serial Number: {device.get('serialNumber', 'N/A')}")
+    print(f"   - Device Type ID: {device.get('deviceTypeId', 'N/A')}")
+    print(f"   - Protocol Port: {device.get('protocolPort', 'N/A')}")
+    serial_number = device.get('serialNumber')
+
+    # 2. Conexiones en el puerto
+    print(f"\n2. CONEXIONES EN PUERTO {port} (Últimas 5)")
+    print("-" * 80)
+    connections = results["connections"]
+    device_id_trimmed = None
+    if connections:
+        print(f"✅ Encontradas {len(connections)} conexiones recientes")
+        for idx, conn in enumerate(connections, 1):
+            print(f"\n   Conexión #{idx}:")
+            print(f"   - Connection ID: {conn['_id']}")
+            print(f"   - Fecha: {conn.get('cd', 'N/A')}")
+            print(f"   - IP: {conn.get('ip', 'N/A')}")
+            print(f"   - Puerto: {conn.get('pp', 'N/A')}")
+            if not conn.get('m'):
+                continue
+
+            print(f"   - Mensajes: {conn['n']}")
+            first_msg = bytes(conn['m'][0])
+            print(f"   - Primer mensaje (hex): {first_msg.hex(' ').upper()[:60]}...")
+
+            # Device ID BCD en bytes 5-10 (después del 0x7E inicial)
+            jt808 = jt808_device_id(first_msg)
+            if jt808:
+                device_id_bcd, device_id_trimmed = jt808
+                print(f"   - Device ID del mensaje (BCD completo): {device_id_bcd}")
+                print(f"   - Device ID del mensaje (sin leading zeros): {device_id_trimmed}")
+                if device_id_trimmed == serial_number:
+                    print(f"   - ✅ Device ID COINCIDE con Serial Number del Asset")
+                else:
+                    print(f"   - ❌ Device ID NO COINCIDE:")
+                    print(f"      Mensaje: {device_id_trimmed}")
+                    print(f"      Asset:   {serial_number}")
+
+            if len(first_msg) >= 3:
+                print(f"   - Tipo de mensaje: {jt808_message_type(jt808_message_id(first_msg))}")
+    else:
+        print(f"❌ No se encontraron conexiones en el puerto {port}")
+
+    # 3. Mensajes guardados
+    print("\n3. MENSAJES GUARDADOS DEL ASSET")
+    print("-" * 80)
+    message_count = results["message_count"]
+    print(f"Total de mensajes guardados: {message_count}")
+    if message_count > 0:
+        print("✅ Hay mensajes guardados")
+        for idx, msg in enumerate(results["messages"], 1):
+            print(f"\n   Mensaje #{idx}:")
+            print(f"   - Message ID: {msg['_id']}")
+            print(f"   - Fecha creación: {msg.get('cd', 'N/A')}")
+            print(f"   - Connection ID: {msg.get('cid', 'N/A')}")
+            if msg.get('pos'):
+                pos = msg['pos']
+                print(f"   - Position:")
+                print(f"     • Latitud: {pos.get('lat', 'N/A')}")
+                print(f"     • Longitud: {pos.get('lon', 'N/A')}")
+                print(f"     • Fecha GPS: {pos.get('dt', 'N/A')}")
+                print(f"     • Válido: {pos.get('v', 'N/A')}")
+                print(f"     • Velocidad: {pos.get('spd', 'N/A')}")
+                print(f"     • Rumbo: {pos.get('hdg', 'N/A')}")
+            else:
+                print(f"   - ⚠️ Sin datos de posición")
+            if msg.get('md'):
+                print(f"   - Metadata:")
+                print(f"     • Asset ID: {msg['md'].get('aid', 'N/A')}")
+                print(f"     • Device ID: {msg['md'].get('did', 'N/A')}")
+    else:
+        print("⚠️ NO hay mensajes guardados - El dispositivo NO está enviando ubicaciones")
+        print("   Posibles causas:")
+        print("   1. El dispositivo solo envía mensajes de registro (0x0100)")
+        print("   2. El dispositivo no recibe respuestas válidas del servidor")
+        print("   3. El Serial Number no coincide con el Device ID del mensaje")
+
+    # 4. Buscar Asset con diferentes variantes del Device ID
+    print("\n4. BÚSQUEDA DE ASSET POR SERIAL NUMBER")
+    print("-" * 80)
+    latest = jt808_device_id(bytes(connections[0]['m'][0])) if connections and connections[0].get('m') else None
+    if latest:
+        device_id_trimmed = latest[1]
+        test_serials = {latest[0], latest[1], serial_number}
+
+        # Una sola consulta para todas las variantes del Serial Number
+        found_by_serial = {}
+        for found in db.assets.find({
+            "device.serialNumber": {"$in": list(test_serials)},
+            "device.protocolPort": port
+        }, {"name": 1, "device.serialNumber": 1}):
+            found_by_serial.setdefault(found['device']['serialNumber'], found)
+
+        for test_serial in test_serials:
+            found = found_by_serial.get(test_serial)
+            if found:
+                print(f"✅ Asset encontrado con Serial Number: '{test_serial}'")
+                print(f"   Asset ID: {found['_id']}")
+                print(f"   Asset Name: {found['name']}")
+            else:
+                print(f"❌ NO encontrado con Serial Number: '{test_serial}'")
+
+    # 5. Resumen y recomendaciones
+    print("\n5. RESUMEN Y RECOMENDACIONES")
+    print("=" * 80)
+    if message_count > 0:
+        print("✅ TODO ESTÁ BIEN - El dispositivo está funcionando correctamente")
+        print("   - Asset configurado correctamente")
+        print("   - Device ID coincide")
+        print("   - Mensajes se están guardando")
+    else:
+        print("⚠️ PROBLEMA DETECTADO - El dispositivo NO está enviando ubicaciones")
+        print("\nAcciones requeridas:")
+        print("1. Verificar que el Listener esté ejecutándose con el código actualizado")
+        print("2. Reiniciar el Listener para que cargue las correcciones")
+        print("3. El dispositivo debe registrarse nuevamente después del reinicio")
+        print("4. Verificar que el Serial Number en el Asset sea: '{}'".format(
+            device_id_trimmed or serial_number))
+    print("\n" + "=" * 80)
+    return 0
+
+
+def analyze_imei(args):
+    msg_hex = args.hex
+    msg_bytes = bytes.fromhex(msg_hex.replace(" ", ""))
+
+    print("=" * 80)
+    print("ANALISIS DE IMEI CONCOX/GT06")
+    print("=" * 80)
+    print()
+    print("Mensaje completo (hex):", msg_hex)
+    print("Mensaje completo (bytes):", msg_bytes.hex(" ").upper().split())
+    print()
+
+    # Paquete extendido (79 79) tiene 1 byte más de largo
+    extended = msg_bytes[0] == 0x79
+    shift = 1 if extended else 0
+
+    print(f"Start bit: 0x{msg_bytes[0]:02X}")
+    print(f"Extended packet: {extended}")
+    print(f"Packet length: {msg_bytes[2]}")
+    print(f"Protocol number: 0x{msg_bytes[3 + shift]:02X} (0x01 = Login)")
+    print()
+
+    # IMEI: 8 bytes desde el índice 4
+    imei_bytes = msg_bytes[4 + shift:12 + shift]
+    print(f"IMEI bytes (índices {4 + shift} a {11 + shift}):", imei_bytes.hex(" ").upper().split())
+    imei_hex = imei_bytes.hex().upper()
+    print(f"IMEI (hex string): {imei_hex}")
+
+    imei_trimmed_once = imei_hex[1:] if imei_hex.startswith("0") else imei_hex
+    print(f"IMEI después de quitar 1 '0': {imei_trimmed_once}")
+    imei_trimmed_all = imei_hex.lstrip('0')
+    print(f"IMEI después de TrimStart('0'): {imei_trimmed_all}")
+    print()
+
+    asset_serial = args.serial
+    print("Serial Number del Asset:", asset_serial)
+    print()
+    print("COMPARACION:")
+    print(f"  IMEI (original):      '{imei_hex}' == '{asset_serial}' ? {imei_hex == asset_serial}")
+    print(f"  IMEI (quita 1 '0'):   '{imei_trimmed_once}' == '{asset_serial}' ? {imei_trimmed_once == asset_serial}")
+    print(f"  IMEI (TrimStart):     '{imei_trimmed_all}' == '{asset_serial}' ? {imei_trimmed_all == asset_serial}")
+    print()
+    if imei_trimmed_all == asset_serial:
+        print("✓ MATCH! Con TrimStart('0') el IMEI coincide con el Serial Number del Asset")
+    else:
+        print("✗ NO MATCH - Hay un problema con la extracción del IMEI")
+
+    print()
+    print("=" * 80)
+    print("RECOMENDACION:")
+    print("=" * 80)
+    if imei_hex.startswith("0") and imei_trimmed_all == asset_serial:
+        print("Cambiar el código de ConcoxMessageHandler.cs línea 128-131:")
+        print()
+        print("  ACTUAL:")
+        print('    if (imei.StartsWith("0"))')
+        print("    {")
+        print("        imei = imei[1..];  // Solo quita 1 cero")
+        print("    }")
+        print()
+        print("  RECOMENDADO:")
+        print("    imei = imei.TrimStart('0');  // Quita todos los ceros al inicio")
+    print()
+    return 0
+
+
+def shell(args):
+    """Ejecuta un subcomando por línea reutilizando el mismo MongoClient."""
+    source = open(args.file) if args.file else sys.stdin
+    interactive = source.isatty()
+    status = 0
+    try:
+        while True:
+            if interactive:
+                try:
+                    line = input("navtrack> ")
+                except EOFError:
+                    print()
+                    break
+            else:
+                line = source.readline()
+                if not line:
+                    break
+
+            argv = shlex.split(line, comments=True)
+            if not argv:
+                continue
+            if argv[0] in ("exit", "quit"):
+                break
+            if argv[0] == "shell":
+                print("ERROR: shell no se puede anidar")
+                continue
+
+            try:
+                # Los subcomandos heredan la URI y la base del shell, salvo que la línea las indique
+                status = run(argv, uri=args.uri, db=args.db) or status
+            except SystemExit as e:
+                # argparse y los errores de ID salen con SystemExit: no deben cerrar el shell
+                if e.code not in (None, 0):
+                    status = 1
+            except Exception as e:
+                print(f"ERROR: {e}")
+                status = 1
+    finally:
+        if args.file:
+            source.close()
+    return status
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Diagnóstico de navtrack")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--uri", help="URI de MongoDB (o NAVTRACK_MONGO_URI)")
+    common.add_argument("--db", help="base de datos (o NAVTRACK_DB)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("check-asset", parents=[common], help="valida un asset, su device y sus conexiones")
+    p.add_argument("asset_id", nargs="?")
+    p.add_argument("--port", type=int, default=7013)
+    p.add_argument("--limit", type=int, default=5)
+    p.set_defaults(func=check_asset)
+
+    p = sub.add_parser("check-port", parents=[common], help="valida el protocolo de un puerto para un asset")
+    p.add_argument("asset_id", nargs="?")
+    p.add_argument("--port", type=int, default=7013)
+    p.add_argument("--limit", type=int, default=10)
+    p.set_defaults(func=check_port)
+
+    p = sub.add_parser("monitor", parents=[common], help="monitorea conexiones y mensajes de un device")
+    p.add_argument("device_id", nargs="?")
+    p.add_argument("--port", type=int, default=7053)
+    p.add_argument("--interval", type=float, default=10)
+    p.set_defaults(func=monitor)
+
+    p = sub.add_parser("validate", parents=[common], help="validación completa de un asset JT/T 808")
+    p.add_argument("asset_id", nargs="?")
+    p.add_argument("--port", type=int, default=7053)
+    p.set_defaults(func=validate)
+
+    p = sub.add_parser("analyze-imei", parents=[common], help="analiza la extracción del IMEI de un login Concox/GT06")
+    p.add_argument("hex", nargs="?", default="78 78 0D 01 00 00 01 84 04 22 83 23 00 03 67 86 0D 0A")
+    p.add_argument("--serial", default="18404228323")
+    p.set_defaults(func=analyze_imei)
+
+    p = sub.add_parser("shell", parents=[common], help="ejecuta subcomandos por línea con una sola conexión")
+    p.add_argument("--file", help="archivo con un subcomando por línea (por defecto stdin)")
+    p.set_defaults(func=shell)
+
+    return parser
+
+
+def run(argv, uri=None, db=None):
+    """Ejecuta un subcomando; uri y db son los valores por defecto de --uri y --db."""
+    args = build_parser().parse_args(argv)
+    for name, default in (("uri", uri), ("db", db)):
+        if hasattr(args, name) and not getattr(args, name):
+            setattr(args, name, default or None)
+    return args.func(args)
+
+
+def main(argv=None):
+    return run(sys.argv[1:] if argv is None else argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Consultas compartidas por los scripts de validación (CheckAsset, CheckGT06,
+ValidateDB).
+
+Cada sección de los scripts es una consulta independiente a MongoDB remoto,
+así que se lanzan todas juntas en un pool de hilos (MongoClient es thread-safe
+y reutiliza su pool de conexiones) y el costo total queda en ~1 round trip.
+Las proyecciones traen solo los campos que se imprimen: de devices_connections
+solo la cantidad de tramas y la primera, nunca el arreglo `m` completo.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+# Campos de devices_messages que muestran los scripts
+MESSAGE_FIELDS = {"cd": 1, "cid": 1, "pos": 1, "md": 1}
+
+
+def run_parallel(queries, max_workers=None):
+    """
+    Ejecuta concurrentemente un dict {nombre: callable} y retorna
+    {nombre: resultado}. Las excepciones se propagan al leer el resultado.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or len(queries) or 1) as pool:
+        futures = {name: pool.submit(query) for name, query in queries.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def recent_connections(db, port, limit):
+    """
+    Últimas conexiones de un puerto con `n` (cantidad de tramas) y `m`
+    recortado a la primera trama, calculados del lado del servidor.
+    """
+    return list(db.devices_connections.aggregate([
+        {"$match": {"pp": port}},
+        {"$sort": {"cd": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "cd": 1, "ip": 1, "pp": 1, "md": 1,
+            "n": {"$size": {"$ifNull": ["$m", []]}},
+            "m": {"$slice": [{"$ifNull": ["$m", []]}, 1]},
+        }},
+    ]))
+
+
+def recent_messages(db, query, limit):
+    """Últimos mensajes guardados que cumplen query, solo con MESSAGE_FIELDS."""
+    return list(db.devices_messages.find(query, MESSAGE_FIELDS).sort("cd", -1).limit(limit))
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Segmentación de viajes sobre las posiciones guardadas en devices_messages.
+
+Permite validar la detección de viajes independientemente de
+AssetsTripsController. Las posiciones de cada device se dividen en viajes y
+paradas con los mismos umbrales de TripService:
+
+    - un hueco de más de MAX_GAP_MINUTES o un salto de más de
+      MAX_JUMP_METERS corta el viaje
+    - una parada (velocidad <= --stop-speed durante --stop-minutes) cierra
+      el viaje en la primera posición detenida
+    - se descartan viajes con <= MIN_TRIP_POSITIONS posiciones o con
+      <= MIN_TRIP_DISTANCE_METERS de distancia
+
+TripSegmenter procesa las posiciones de un device en una sola pasada y con
+memoria constante. segment_arrays hace lo mismo vectorizado con numpy cuando
+la serie completa ya está en memoria. La flota se procesa en paralelo, un
+device por tarea.
+
+Uso:
+    python3 SegmentTrips.py [--uri mongodb://...] [--device-id <ObjectId>]
+        [--workers 8] [--vectorized] [--output viajes.jsonl]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+# Umbrales de TripService (Navtrack.Api.Services/Trips)
+MAX_GAP_MINUTES = 5
+MAX_JUMP_METERS = 1000
+MIN_TRIP_DISTANCE_METERS = 300
+MIN_TRIP_POSITIONS = 10
+
+STOP_SPEED_KMH = 3.0
+STOP_MINUTES = 5.0
+
+# Radio usado por DistanceCalculator.CalculateDistance
+EARTH_RADIUS_METERS = 6376500.0
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+Trip = namedtuple(
+    "Trip",
+    ["device_id", "start", "end", "start_lat", "start_lon", "end_lat", "end_lon",
+     "distance_m", "duration_min", "max_speed", "positions"],
+)
+
+
+def distance_meters(lat1, lon1, lat2, lon2):
+    """Haversine truncado a metros enteros, igual que DistanceCalculator."""
+    d1, d2 = math.radians(lat1), math.radians(lat2)
+    dlon = math.radians(lon2) - math.radians(lon1)
+    a = math.sin((d2 - d1) / 2.0) ** 2 + math.cos(d1) * math.cos(d2) * math.sin(dlon / 2.0) ** 2
+    return int(EARTH_RADIUS_METERS * 2.0 * math.atan2(math.sqrt(a), math.sqrt(1.0 - a)))
+
+
+def to_seconds(dt):
+    return (dt - UNIX_EPOCH).total_seconds()
+
+
+class TripSegmenter:
+    """
+    Segmentador en streaming para un device: push() recibe posiciones en
+    orden de fecha y retorna los viajes que se cierran con esa posición.
+    Solo guarda la posición anterior y los acumuladores del viaje en curso.
+    """
+
+    def __init__(self, device_id=None, stop_speed=STOP_SPEED_KMH, stop_minutes=STOP_MINUTES,
+                 max_gap_minutes=MAX_GAP_MINUTES, max_jump_meters=MAX_JUMP_METERS,
+                 min_distance=MIN_TRIP_DISTANCE_METERS, min_positions=MIN_TRIP_POSITIONS):
+        self.device_id = device_id
+        self.stop_speed = stop_speed
+        self.stop_seconds = stop_minutes * 60
+        self.max_gap_seconds = max_gap_minutes * 60
+        self.max_jump_meters = max_jump_meters
+        self.min_distance = min_distance
+        self.min_positions = min_positions
+
+        self._last = None       # (t, lat, lon, speed)
+        self._trip = None       # [t0, lat0, lon0, t1, lat1, lon1, distance, max_speed, positions]
+        self._stop = None       # copia de _trip en la primera posición detenida
+
+    def push(self, t, lat, lon, speed=None):
+        """
+        Agrega una posición (t en segundos o datetime, speed en km/h o None
+        para derivarla de la distancia recorrida).
+        """
+        if isinstance(t, datetime):
+            t = to_seconds(t)
+        closed = []
+
+        step, elapsed = 0, 0.0
+        if self._last is not None:
+            elapsed = t - self._last[0]
+            step = distance_meters(self._last[1], self._last[2], lat, lon)
+            if elapsed > self.max_gap_seconds or step > self.max_jump_meters:
+                closed += self._close()
+                self._last = None
+                step, elapsed = 0, 0.0
+
+        if speed is None:
+            speed = step / elapsed * 3.6 if elapsed > 0 else 0.0
+        moving = speed > self.stop_speed
+
+        trip = self._trip
+        if trip is None:
+            if moving:
+                # El viaje arranca en la posición anterior (la última detenida)
+                if self._last is not None:
+                    lt, llat, llon, lspeed = self._last
+                    self._trip = [lt, llat, llon, t, lat, lon, step, max(lspeed, speed), 2]
+                else:
+                    self._trip = [t, lat, lon, t, lat, lon, 0, speed, 1]
+        else:
+            trip[3], trip[4], trip[5] = t, lat, lon
+            trip[6] += step
+            trip[8] += 1
+            if speed > trip[7]:
+                trip[7] = speed
+
+            if moving:
+                self._stop = None
+            else:
+                if self._stop is None:
+                    self._stop = trip[:]
+                if t - self._stop[3] >= self.stop_seconds:
+                    closed += self._close()
+
+        self._last = (t, lat, lon, speed)
+        return closed
+
+    def flush(self):
+        """Cierra el viaje en curso al terminar la serie."""
+        closed = self._close()
+        self._last = None
+        return closed
+
+    def _close(self):
+        trip = self._stop or self._trip
+        self._trip = self._stop = None
+        if trip is None or trip[8] <= self.min_positions or trip[6] <= self.min_distance:
+            return []
+        return [make_trip(self.device_id, *trip)]
+
+
+def make_trip(device_id, t0, lat0, lon0, t1, lat1, lon1, distance, max_speed, positions):
+    return Trip(
+        device_id,
+        UNIX_EPOCH + timedelta(seconds=float(t0)), UNIX_EPOCH + timedelta(seconds=float(t1)),
+        float(lat0), float(lon0), float(lat1), float(lon1),
+        int(distance), math.ceil((t1 - t0) / 60.0), round(float(max_speed), 1), int(positions),
+    )
+
+
+def segment_arrays(t, lat, lon, speed=None, device_id=None, stop_speed=STOP_SPEED_KMH,
+                   stop_minutes=STOP_MINUTES, max_gap_minutes=MAX_GAP_MINUTES,
+                   max_jump_meters=MAX_JUMP_METERS, min_distance=MIN_TRIP_DISTANCE_METERS,
+                   min_positions=MIN_TRIP_POSITIONS):
+    """
+    Versión vectorizada de TripSegmenter para una serie completa en memoria.
+    t en segundos; speed puede tener NaN donde no hay velocidad. Produce los
+    mismos viajes que alimentar TripSegmenter posición por posición.
+    """
+    import numpy as np
+
+    t = np.asarray(t, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    n = len(t)
+    if n == 0:
+        return []
+
+    # Distancia y tiempo respecto a la posición anterior
+    rlat, rlon = np.radians(lat), np.radians(lon)
+    a = (np.sin((rlat[1:] - rlat[:-1]) / 2.0) ** 2 +
+         np.cos(rlat[:-1]) * np.cos(rlat[1:]) * np.sin((rlon[1:] - rlon[:-1]) / 2.0) ** 2)
+    step = np.zeros(n)
+    step[1:] = np.trunc(EARTH_RADIUS_METERS * 2.0 * np.arctan2(np.sqrt(a), np.sqrt(1.0 - a)))
+    elapsed = np.zeros(n)
+    elapsed[1:] = np.diff(t)
+
+    # Cortes duros: hueco de tiempo o salto de distancia
+    hard = np.zeros(n, dtype=bool)
+    hard[0] = True
+    hard[1:] = (elapsed[1:] > max_gap_minutes * 60) | (step[1:] > max_jump_meters)
+    step[hard] = 0
+    elapsed[hard] = 0
+
+    derived = np.divide(step * 3.6, elapsed, out=np.zeros(n), where=elapsed > 0)
+    speed = derived if speed is None else np.where(np.isnan(np.asarray(speed, dtype=float)),
+                                                   derived, np.asarray(speed, dtype=float))
+    moving = speed > stop_speed
+    cum = np.cumsum(step)
+    index = np.arange(n)
+
+    # Última posición de cada segmento entre cortes duros
+    seg_end = np.flatnonzero(np.append(hard[1:], True))
+
+    # Rachas detenidas: inicio de cada racha y si dura lo suficiente para cortar
+    stopped = ~moving
+    run_start = stopped & (hard | np.append(True, moving[:-1]))
+    start_of = np.maximum.accumulate(np.where(run_start, index, -1))
+    qualifies = stopped & (start_of >= 0) & (t - t[np.maximum(start_of, 0)] >= stop_minutes * 60)
+
+    # Fines de viaje: rachas que califican como parada, o el fin de cada
+    # segmento (en el inicio de su racha detenida final, si termina detenido)
+    ends = set(start_of[qualifies].tolist())
+    for last in seg_end.tolist():
+        ends.add(int(start_of[last]) if stopped[last] else last)
+    ends = np.array(sorted(ends), dtype=np.int64)
+
+    trips = []
+    moving_index = np.flatnonzero(moving)
+    if len(moving_index) == 0:
+        return trips
+
+    # Cada posición en movimiento pertenece al viaje que cierra el primer fin >= ella
+    owner = ends[np.searchsorted(ends, moving_index)]
+    first = np.flatnonzero(np.append(True, owner[1:] != owner[:-1]))
+    for k in first.tolist():
+        start, end = int(moving_index[k]), int(owner[k])
+        if start > 0 and not hard[start]:
+            start -= 1
+        positions = end - start + 1
+        distance = cum[end] - cum[start]
+        if positions <= min_positions or distance <= min_distance:
+            continue
+        trips.append(make_trip(device_id, t[start], lat[start], lon[start], t[end], lat[end], lon[end],
+                               distance, speed[start:end + 1].max(), positions))
+    return trips
+
+
+def fetch_positions(db, device_id, batch_size=10_000):
+    """Posiciones de un device en orden de pos.d, solo con los campos necesarios."""
+    cursor = db.devices_messages.find(
+        {"md.did": device_id, "pos.d": {"$ne": None}},
+        {"_id": 0, "pos.c": 1, "pos.d": 1, "pos.spd": 1},
+    ).sort("pos.d", 1).batch_size(batch_size)
+    for msg in cursor:
+        pos = msg["pos"]
+        lon, lat = pos["c"]
+        yield pos["d"], lat, lon, pos.get("spd")
+
+
+# Base de datos del proceso del pool: un MongoClient por worker, no por device
+_worker_db = None
+
+
+def init_worker(uri, db_name):
+    """Initializer del pool: abre el MongoClient que reutilizan todas las tareas del proceso."""
+    global _worker_db
+    from pymongo import MongoClient
+    _worker_db = MongoClient(uri)[db_name]
+
+
+def segment_device(task):
+    """Segmenta un device; se ejecuta en un proceso del pool."""
+    device_id, vectorized, options = task
+    positions = fetch_positions(_worker_db, device_id)
+    if vectorized:
+        rows = list(positions)
+        if not rows:
+            return []
+        dts, lats, lons, speeds = zip(*rows)
+        return segment_arrays([to_seconds(d) for d in dts], lats, lons,
+                              [math.nan if s is None else s for s in speeds],
+                              device_id=str(device_id), **options)
+
+    segmenter = TripSegmenter(str(device_id), **options)
+    trips = []
+    for dt, lat, lon, speed in positions:
+        trips += segmenter.push(dt, lat, lon, speed)
+    return trips + segmenter.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Segmenta las posiciones guardadas en viajes")
+    parser.add_argument("--uri", default=os.environ.get("NAVTRACK_MONGO_URI", "mongodb://31.97.146.1:27017"))
+    parser.add_argument("--db", default=os.environ.get("NAVTRACK_DB", "navtrack"))
+    parser.add_argument("--device-id", action="append", help="ObjectId del device (repetible; por defecto toda la flota)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--vectorized", action="store_true", help="carga cada serie completa y usa numpy")
+    parser.add_argument("--stop-speed", type=float, default=STOP_SPEED_KMH, help="km/h")
+    parser.add_argument("--stop-minutes", type=float, default=STOP_MINUTES)
+    parser.add_argument("--output", help="archivo JSON lines con un viaje por línea")
+    args = parser.parse_args(argv)
+
+    from pymongo import MongoClient
+    from bson import ObjectId
+
+    if args.device_id:
+        device_ids = [ObjectId(d) for d in args.device_id]
+    else:
+        with MongoClient(args.uri) as client:
+            device_ids = [d["_id"] for d in client[args.db].devices.find({}, {"_id": 1})]
+
+    print("=" * 80)
+    print(f"SEGMENTACION DE VIAJES - {len(device_ids)} devices")
+    print("=" * 80)
+    print()
+
+    options = {"stop_speed": args.stop_speed, "stop_minutes": args.stop_minutes}
+    tasks = [(d, args.vectorized, options) for d in device_ids]
+    started = time.perf_counter()
+    trips = []
+    with Pool(args.workers, initializer=init_worker, initargs=(args.uri, args.db)) as pool:
+        for device_trips in pool.imap_unordered(segment_device, tasks, chunksize=4):
+            trips += device_trips
+
+    trips.sort(key=lambda trip: (trip.device_id, trip.start))
+    by_device = {}
+    for trip in trips:
+        by_device.setdefault(trip.device_id, []).append(trip)
+
+    for device_id, device_trips in by_device.items():
+        print(f"   Device {device_id}: {len(device_trips)} viajes, "
+              f"{sum(x.distance_m for x in device_trips) / 1000:.1f} km")
+        for trip in device_trips[:3]:
+            print(f"     - {trip.start} → {trip.end} ({trip.duration_min:g} min) "
+                  f"{trip.distance_m} m, vel. máx {trip.max_speed} km/h, {trip.positions} posiciones")
+    print()
+    print(f"Total: {len(trips)} viajes en {time.perf_counter() - started:.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for trip in trips:
+                f.write(json.dumps(trip._asdict(), default=str) + "\n")
+        print(f"Viajes guardados en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
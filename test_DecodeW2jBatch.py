@@ -0,0 +1,131 @@
+"""Pruebas del decodificador JT/T 808 (python -m pytest -q)."""
+import struct
+from datetime import datetime
+
+import pytest
+
+from DecodeW2jBatch import (
+    BATCH_LOCATION_REPORT, LOCATION_REPORT, FrameError, checksum, decode_columns, iter_frames, parse_frame,
+)
+
+DT = datetime(2025, 1, 2, 3, 4, 5)
+
+
+def frame(payload):
+    """Trama 0x7E ... 0x7E con checksum válido y escape de 0x7D/0x7E."""
+    data = payload + bytes([checksum(payload)])
+    return b"\x7e" + data.replace(b"\x7d", b"\x7d\x01").replace(b"\x7e", b"\x7d\x02") + b"\x7e"
+
+
+def jt808(msg_id, body, seq=7, packet=None):
+    """Trama JT/T 808 con header 2013; packet=(total, índice) activa el bit de subpaquete."""
+    attr = len(body) & 0x03FF | (0x2000 if packet else 0)
+    header = struct.pack(">HH", msg_id, attr) + bytes.fromhex("018404228323") + struct.pack(">H", seq)
+    if packet:
+        header += struct.pack(">HH", *packet)
+    return frame(header + body)
+
+
+def location(lat_raw, lon_raw, status, speed=425, heading=90, dt=DT):
+    return struct.pack(">IIIIHHH", 0, status, lat_raw, lon_raw, 2240, speed, heading) + \
+        bytes.fromhex(dt.strftime("%y%m%d%H%M%S"))
+
+
+def batch(items):
+    return struct.pack(">HB", len(items), 1) + b"".join(struct.pack(">H", len(i)) + i for i in items)
+
+
+def columns_as_tuples(cols):
+    return list(zip(cols["device_id"], cols["dt"], cols["lat"], cols["lon"], cols["spd"], cols["valid"]))
+
+
+def locations_as_tuples(locations):
+    return [(loc.device_id, loc.dt, loc.lat, loc.lon, loc.spd, int(loc.valid)) for loc in locations]
+
+
+# 0x0200 con el bit 14 (header 2019) pero solo 13 bytes de header: 14 con checksum
+SHORT_2019 = frame(bytes.fromhex("0200 4000") + bytes(9))
+
+
+def test_short_2019_header_raises_frame_error():
+    with pytest.raises(FrameError):
+        parse_frame(SHORT_2019)
+
+
+def test_short_2019_header_is_skipped():
+    errors = []
+    assert list(iter_frames([SHORT_2019], errors=errors)) == []
+    assert len(errors) == 1 and isinstance(errors[0][1], FrameError)
+    assert len(decode_columns([SHORT_2019])["lat"]) == 0
+
+
+def test_batch_with_escaped_bytes():
+    # 0x01287E7D y 0x067D7E01 obligan a escapar 7E y 7D dentro del cuerpo
+    items = [location(0x01287E7D, 0x067D7E01, 0x02, speed=i) for i in range(3)]
+    raw = jt808(BATCH_LOCATION_REPORT, batch(items))
+    assert b"\x7d\x02" in raw and b"\x7d\x01" in raw
+
+    locations = list(iter_frames([raw]))
+    assert len(locations) == 3
+    assert [loc.spd for loc in locations] == [0.0, 0.1, 0.2]
+    assert locations[0].lat == 0x01287E7D / 1_000_000.0
+    assert locations[0].lon == 0x067D7E01 / 1_000_000.0
+    assert locations[0].device_id == "18404228323" and locations[0].seq == 7
+    assert locations[0].dt == DT and locations[0].alt == 2240 and locations[0].hdg == 90
+
+
+@pytest.mark.parametrize("status, lat_sign, lon_sign, valid", [
+    (0x02, 1, 1, True),
+    (0x0A, -1, 1, True),
+    (0x06, 1, -1, True),
+    (0x0C, -1, -1, False),
+])
+def test_hemisphere_and_valid_bits(status, lat_sign, lon_sign, valid):
+    raw = jt808(LOCATION_REPORT, location(19_430_000, 99_130_000, status))
+    (loc,) = iter_frames([raw])
+    assert (loc.lat, loc.lon, loc.valid) == (lat_sign * 19.43, lon_sign * 99.13, valid)
+
+
+def test_body_longer_than_length_field():
+    # 40 items de 2 + 28 bytes: 2723 bytes, más de lo que caben en 10 bits
+    items = [location(19_430_000 + i, 99_130_000, 0x06, dt=DT.replace(second=i)) for i in range(40)]
+    body = batch(items)
+    assert len(body) > 0x03FF
+    locations = list(iter_frames([jt808(BATCH_LOCATION_REPORT, body)]))
+    assert len(locations) == 40
+    assert locations[-1].lat == 19.430039 and locations[-1].dt == DT.replace(second=39)
+
+
+def test_both_decode_paths_agree():
+    frames = [
+        jt808(LOCATION_REPORT, location(19_430_000, 99_130_000, 0x0E)),
+        jt808(BATCH_LOCATION_REPORT, batch([location(1_000_000 * i, 2_000_000, 0x02 * (i % 2)) for i in range(25)])),
+        jt808(0x0100, bytes(37)),
+        SHORT_2019,
+        # Lote truncado: declara 3 items pero trae 2
+        jt808(BATCH_LOCATION_REPORT, batch([location(1, 2, 0x02)] * 2)[:-1]),
+        jt808(BATCH_LOCATION_REPORT, struct.pack(">HB", 3, 1) + batch([location(1, 2, 0x02)] * 2)[3:]),
+    ]
+    errors = []
+    expected = locations_as_tuples(iter_frames(frames, errors=errors))
+    assert len(expected) == 26
+    assert [i for i, _ in errors] == [3, 4, 5]
+    assert columns_as_tuples(decode_columns(frames)) == expected
+
+
+def test_subpackage_continuation_is_rejected():
+    body = batch([location(19_430_000, 99_130_000, 0x02)] * 60)
+    first = jt808(BATCH_LOCATION_REPORT, body[:900], packet=(2, 1))
+    rest = jt808(BATCH_LOCATION_REPORT, body[900:], packet=(2, 2))
+
+    with pytest.raises(FrameError, match="subpaquete 2/2"):
+        parse_frame(rest)
+    errors = []
+    assert list(iter_frames([first, rest], errors=errors)) == []
+    assert [i for i, _ in errors] == [0, 1]
+    assert len(decode_columns([first, rest])["lat"]) == 0
+
+
+def test_single_subpackage_decodes():
+    raw = jt808(BATCH_LOCATION_REPORT, batch([location(19_430_000, 99_130_000, 0x02)] * 2), packet=(1, 1))
+    assert len(list(iter_frames([raw]))) == 2
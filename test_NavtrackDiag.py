@@ -0,0 +1,78 @@
+"""Pruebas de los argumentos de NavtrackDiag y sus wrappers (python -m pytest -q)."""
+import io
+import os
+import runpy
+import sys
+
+import pytest
+
+import NavtrackDiag
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+WRAPPERS = {
+    "CheckAsset.py": ("check_asset", "asset_id", "NAVTRACK_ASSET_ID", "6928844454413d1c0bb50ee9", 7013),
+    "CheckGT06.py": ("check_port", "asset_id", "NAVTRACK_ASSET_ID", "69246acd54413d1c0bb50ee5", 7013),
+    "MonitorW2j.py": ("monitor", "device_id", "NAVTRACK_DEVICE_ID", "692a51accc7cfd0ee2d5b49e", 7053),
+    "ValidateDB.py": ("validate", "asset_id", "NAVTRACK_ASSET_ID", "69246acd54413d1c0bb50ee5", 7053),
+}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Reemplaza los subcomandos por uno que registra el ID resuelto y las opciones."""
+    recorded = []
+    for func, id_attr, env, _, _ in WRAPPERS.values():
+        def record(args, id_attr=id_attr, env=env):
+            recorded.append({"id": getattr(args, id_attr) or os.environ.get(env),
+                             "uri": args.uri, "db": args.db, "port": args.port})
+            return 0
+        monkeypatch.setattr(NavtrackDiag, func, record)
+    for _, _, env, _, _ in WRAPPERS.values():
+        monkeypatch.delenv(env, raising=False)
+    return recorded
+
+
+def run_wrapper(monkeypatch, name, *argv):
+    monkeypatch.setattr(sys, "argv", [name, *argv])
+    with pytest.raises(SystemExit) as e:
+        runpy.run_path(os.path.join(HERE, name))
+    return e.value.code
+
+
+@pytest.mark.parametrize("name", WRAPPERS)
+def test_wrapper_defaults(monkeypatch, calls, name):
+    _, _, _, default_id, port = WRAPPERS[name]
+    assert run_wrapper(monkeypatch, name) == 0
+    assert calls == [{"id": default_id, "uri": None, "db": None, "port": port}]
+
+
+@pytest.mark.parametrize("name", WRAPPERS)
+def test_wrapper_options_keep_default_id(monkeypatch, calls, name):
+    _, _, _, default_id, _ = WRAPPERS[name]
+    assert run_wrapper(monkeypatch, name, "--db", "navtrack_bench", "--port", "7100") == 0
+    assert calls == [{"id": default_id, "uri": None, "db": "navtrack_bench", "port": 7100}]
+
+
+@pytest.mark.parametrize("name", WRAPPERS)
+def test_wrapper_id_after_options(monkeypatch, calls, name):
+    assert run_wrapper(monkeypatch, name, "--uri", "mongodb://x", "abc") == 0
+    assert calls[0]["id"] == "abc" and calls[0]["uri"] == "mongodb://x"
+
+
+@pytest.mark.parametrize("name", WRAPPERS)
+def test_wrapper_id_from_environment(monkeypatch, calls, name):
+    _, _, env, _, _ = WRAPPERS[name]
+    monkeypatch.setenv(env, "from-env")
+    assert run_wrapper(monkeypatch, name, "--db", "b") == 0
+    assert calls[0]["id"] == "from-env"
+
+
+def test_shell_lines_keep_their_uri_and_db(monkeypatch, calls):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("validate A --uri mongodb://other --db b2\nvalidate B\n"))
+    args = NavtrackDiag.build_parser().parse_args(["shell", "--uri", "mongodb://shell", "--db", "s"])
+    assert NavtrackDiag.shell(args) == 0
+    assert [(c["id"], c["uri"], c["db"]) for c in calls] == [
+        ("A", "mongodb://other", "b2"),
+        ("B", "mongodb://shell", "s"),
+    ]
@@ -0,0 +1,122 @@
+"""Pruebas de la segmentación de viajes (python -m pytest -q)."""
+import math
+import random
+from datetime import timedelta
+
+import pytest
+
+from SegmentTrips import UNIX_EPOCH, TripSegmenter, distance_meters, segment_arrays
+
+# ~100 m hacia el norte por paso
+STEP_LAT = 0.0009
+
+
+def stream(rows, **options):
+    segmenter = TripSegmenter("d", **options)
+    trips = []
+    for t, lat, lon, speed in rows:
+        trips += segmenter.push(t, lat, lon, speed)
+    return trips + segmenter.flush()
+
+
+def vectorized(rows, **options):
+    t, lat, lon, speed = zip(*rows)
+    return segment_arrays(t, lat, lon, [math.nan if s is None else s for s in speed], device_id="d", **options)
+
+
+@pytest.fixture(params=["stream", "vectorized"])
+def segment(request):
+    if request.param == "vectorized":
+        pytest.importorskip("numpy")
+        return vectorized
+    return stream
+
+
+def drive(t, lat, count, speed=36.0, interval=10.0):
+    """count posiciones en movimiento hacia el norte desde (t, lat)."""
+    return [(t + i * interval, lat + i * STEP_LAT, -99.1, speed) for i in range(count)]
+
+
+def park(t, lat, count, interval=10.0):
+    return [(t + i * interval, lat, -99.1, 0.0) for i in range(count)]
+
+
+def path_length(rows):
+    return sum(distance_meters(a[1], a[2], b[1], b[2]) for a, b in zip(rows, rows[1:]))
+
+
+def test_trip_ends_at_first_stopped_position(segment):
+    rows = park(0.0, 19.4, 1) + drive(10.0, 19.4 + STEP_LAT, 20)
+    rows += park(210.0, rows[-1][1], 40)
+
+    (trip,) = segment(rows)
+    # Arranca en la última posición detenida y termina en la primera detenida
+    assert (trip.start, trip.end) == (UNIX_EPOCH, UNIX_EPOCH + timedelta(seconds=210))
+    assert (trip.start_lat, trip.end_lat) == (rows[0][1], rows[21][1])
+    assert trip.positions == 22
+    assert trip.distance_m == path_length(rows[:22])
+    assert trip.duration_min == 4 and trip.max_speed == 36.0
+
+
+def test_short_stop_does_not_cut(segment):
+    rows = drive(0.0, 19.4, 15)
+    rows += park(150.0, rows[-1][1], 10)
+    rows += drive(250.0, rows[-1][1] + STEP_LAT, 15)
+
+    (trip,) = segment(rows)
+    assert trip.positions == 40
+
+
+@pytest.mark.parametrize("cut", ["gap", "jump"])
+def test_gap_or_jump_cuts_trip(segment, cut):
+    first = drive(0.0, 19.4, 15)
+    if cut == "gap":
+        second = drive(first[-1][0] + 600.0, first[-1][1] + STEP_LAT, 15)
+    else:
+        second = drive(first[-1][0] + 10.0, first[-1][1] + 0.02, 15)
+
+    trips = segment(first + second)
+    assert [(t.start_lat, t.end_lat, t.positions) for t in trips] == [
+        (first[0][1], first[-1][1], 15),
+        (second[0][1], second[-1][1], 15),
+    ]
+    assert trips[0].distance_m == path_length(first)
+
+
+def test_short_trips_are_discarded(segment):
+    # 10 posiciones no alcanzan MIN_TRIP_POSITIONS; 10 m por paso no alcanzan la distancia
+    assert segment(drive(0.0, 19.4, 10)) == []
+    crawl = [(t, 19.4 + i * STEP_LAT / 10, lon, speed) for i, (t, _, lon, speed) in enumerate(drive(0.0, 19.4, 20))]
+    assert segment(crawl) == []
+    assert segment(park(0.0, 19.4, 50)) == []
+
+
+def test_speed_derived_from_distance(segment):
+    rows = [(t, lat, lon, None) for t, lat, lon, _ in drive(0.0, 19.4, 20)]
+    (trip,) = segment(rows)
+    assert trip.positions == 20 and 30 < trip.max_speed < 40
+
+
+def random_series(rnd):
+    rows, t, lat, lon = [], 0.0, 19.4, -99.1
+    for i in range(rnd.randrange(50, 600)):
+        t += rnd.choice([5, 10, 10, 30, 60, 400]) if rnd.random() < 0.98 else 4000
+        moving = rnd.random() < (0.6 if (i // 40) % 2 else 0.1)
+        if moving:
+            lat += rnd.uniform(0, 0.002)
+            lon += rnd.uniform(0, 0.002)
+        if rnd.random() < 0.005:
+            lat += 0.05
+        speed = None if rnd.random() < 0.3 else (rnd.uniform(10, 80) if moving else rnd.choice([0, 1, 2]))
+        rows.append((t, lat, lon, speed))
+    return rows
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_vectorized_matches_stream(seed):
+    pytest.importorskip("numpy")
+    rnd = random.Random(seed)
+    rows = random_series(rnd)
+    options = {"stop_minutes": rnd.choice([0, 1, 2, 5]), "min_positions": rnd.choice([0, 3, 10]),
+               "min_distance": rnd.choice([0, 100, 300])}
+    assert vectorized(rows, **options) == stream(rows, **options)